@@ -1,88 +1,185 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional
 import grpc
-from ..schemas import Product, ProductList
+from ..config import settings
+from ..http_cache import conditional_response
+from ..schemas import Product, ProductList, ProductPage
+from ..serialization import (
+    JsonBytesResponse,
+    ndjson_lines,
+    product_json,
+    product_list_json,
+)
 from .. import product_pb2, product_pb2_grpc
 from ..dependencies import catalog_stub_dep
+from ..grpc_catalog_client import catalog_calls, product_batcher
+from ..timing import stage
 
 router = APIRouter()
 
 
-@router.get("/api/products/{product_id}", response_model=Product)
-async def get_product(
-    product_id: str,
+def _product(p: product_pb2.Product) -> Product:
+    return Product(
+        id=p.id,
+        title=p.title,
+        description=p.description,
+        price=p.price,
+        currency=p.currency,
+        image_url=p.image_url or None,
+    )
+
+
+def _http_error(e: grpc.aio.AioRpcError) -> HTTPException:
+    code = e.code()
+    if code == grpc.StatusCode.NOT_FOUND:
+        # DB empty or product not present → 404, not “Catalog error”
+        return HTTPException(status_code=404, detail="Product not found")
+    elif code == grpc.StatusCode.INVALID_ARGUMENT:
+        # e.g. a page_token from another query, or tampered with
+        return HTTPException(status_code=400, detail=e.details())
+    elif code in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED):
+        return HTTPException(status_code=503, detail="Catalog unavailable")
+    else:
+        return HTTPException(
+            status_code=502,
+            detail=f"Catalog error ({code.name})",
+        )
+
+
+async def _ndjson_stream(call) -> StreamingResponse:
+    """Forward a server-streaming catalog call as NDJSON, one product per line.
+
+    The first chunk is awaited before responding so catalog errors still map
+    to a proper status code; later errors can only end the stream early.
+    """
+    chunks = call.__aiter__()
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except grpc.aio.AioRpcError as e:
+        raise _http_error(e)
+
+    def lines(chunk) -> bytes:
+        if settings.fast_json:
+            return ndjson_lines(chunk.products)
+        return b"".join(
+            _product(p).model_dump_json().encode() + b"\n" for p in chunk.products
+        )
+
+    async def body() -> AsyncIterator[bytes]:
+        if first is None:
+            return
+        yield lines(first)
+        async for chunk in chunks:
+            yield lines(chunk)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+# Static paths go before /api/products/{product_id}, which would match them
+@router.get("/api/products/search", response_model=ProductPage)
+async def search_products(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    page_token: Optional[str] = Query(None),
     stub: product_pb2_grpc.CatalogServiceStub = Depends(catalog_stub_dep),
 ):
     try:
-        resp = await stub.GetProduct(
-            product_pb2.GetProductRequest(id=product_id),
-            timeout=0.2,
+        resp = await catalog_calls.call(
+            stub,
+            "SearchProducts",
+            product_pb2.SearchProductsRequest(
+                query=q, limit=limit, page_token=page_token or ""
+            ),
+            0.4,
         )
     except grpc.aio.AioRpcError as e:
-        code = e.code()
-        if code == grpc.StatusCode.NOT_FOUND:
-            # DB empty or product not present → 404, not “Catalog error”
-            raise HTTPException(status_code=404, detail="Product not found")
-        elif code in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED):
-            raise HTTPException(status_code=503, detail="Catalog unavailable")
-        else:
-            raise HTTPException(
-                status_code=502,
-                detail=f"Catalog error ({code.name})",
+        raise _http_error(e)
+    next_page_token = resp.next_page_token or None
+    with stage("serialize"):
+        if settings.fast_json:
+            return JsonBytesResponse(
+                product_list_json(resp.products, next_page_token=next_page_token)
             )
-    # happy path
-    return Product(
-        id=resp.id,
-        title=resp.title,
-        description=resp.description,
-        price=resp.price,
-        currency=resp.currency,
-        image_url=resp.image_url or None,
-    )
+        items = [_product(p) for p in resp.products]
+        return ProductPage(items=items, next_page_token=next_page_token)
 
 
-@router.get("/api/products", response_model=ProductList)
-async def batch_get_products(
+@router.get("/api/products/stream")
+async def stream_products(
     ids: List[str] = Query(..., min_length=1),
     stub: product_pb2_grpc.CatalogServiceStub = Depends(catalog_stub_dep),
 ):
-    resp = await stub.BatchGetProducts(
+    call = stub.StreamBatchGetProducts(
         product_pb2.BatchGetProductsRequest(ids=ids),
-        timeout=0.3,
+        timeout=30,
     )
-    items = [
-        Product(
-            id=p.id,
-            title=p.title,
-            description=p.description,
-            price=p.price,
-            currency=p.currency,
-            image_url=p.image_url or None,
-        )
-        for p in resp.products
-    ]
-    return ProductList(items=items)
+    return await _ndjson_stream(call)
 
 
-@router.get("/api/products/search", response_model=ProductList)
-async def search_products(
+@router.get("/api/products/search/stream")
+async def stream_search_products(
     q: str = Query(..., min_length=1),
-    limit: int = Query(20, ge=1, le=100),
+    limit: int = Query(1000, ge=1, le=10000),
     stub: product_pb2_grpc.CatalogServiceStub = Depends(catalog_stub_dep),
 ):
-    resp = await stub.SearchProducts(
+    call = stub.StreamSearchProducts(
         product_pb2.SearchProductsRequest(query=q, limit=limit),
-        timeout=0.4,
+        timeout=30,
     )
-    items = [
-        Product(
-            id=p.id,
-            title=p.title,
-            description=p.description,
-            price=p.price,
-            currency=p.currency,
-            image_url=p.image_url or None,
-        )
-        for p in resp.products
-    ]
-    return ProductList(items=items)
+    return await _ndjson_stream(call)
+
+
+@router.get("/api/products/{product_id}", response_model=Product)
+async def get_product(
+    product_id: str,
+    request: Request,
+    stub: product_pb2_grpc.CatalogServiceStub = Depends(catalog_stub_dep),
+):
+    async def render() -> bytes:
+        try:
+            if settings.get_product_batching:
+                resp = await product_batcher.get(stub, product_id, timeout=0.2)
+            else:
+                resp = await catalog_calls.call(
+                    stub,
+                    "GetProduct",
+                    product_pb2.GetProductRequest(id=product_id),
+                    0.2,
+                )
+        except grpc.aio.AioRpcError as e:
+            raise _http_error(e)
+        # happy path
+        with stage("serialize"):
+            if settings.fast_json:
+                return product_json(resp)
+            return _product(resp).model_dump_json().encode()
+
+    return await conditional_response(request, render)
+
+
+@router.get("/api/products", response_model=ProductList)
+async def batch_get_products(
+    request: Request,
+    ids: List[str] = Query(..., min_length=1),
+    stub: product_pb2_grpc.CatalogServiceStub = Depends(catalog_stub_dep),
+):
+    async def render() -> bytes:
+        try:
+            resp = await catalog_calls.call(
+                stub,
+                "BatchGetProducts",
+                product_pb2.BatchGetProductsRequest(ids=ids),
+                0.3,
+            )
+        except grpc.aio.AioRpcError as e:
+            raise _http_error(e)
+        with stage("serialize"):
+            if settings.fast_json:
+                return product_list_json(resp.products)
+            items = [_product(p) for p in resp.products]
+            return ProductList(items=items).model_dump_json().encode()
+
+    return await conditional_response(request, render)
@@ -4,6 +4,46 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     app_name: str = "bff"
     catalog_grpc_target: str = "catalog.dev.svc.cluster.local:50051"
+    # channels (connections) to the catalog, picked per call by
+    # "round_robin" or "least_outstanding"; lb_policy spreads each channel
+    # over the catalog replicas DNS returns ("pick_first" = one replica)
+    catalog_channels: int = 4
+    catalog_channel_selection: str = "round_robin"
+    catalog_lb_policy: str = "round_robin"
+    # serialize product responses straight from protobuf with orjson
+    fast_json: bool = True
+    # Cache-Control on product GETs (max_age 0 = "no-cache"); ETag always sent
+    cache_control_max_age: int = 60
+    cache_control_stale_while_revalidate: int = 300
+    # optional in-process cache of product response bodies, keyed by URL
+    response_cache_enabled: bool = False
+    response_cache_ttl_seconds: float = 5.0
+    response_cache_max_entries: int = 10_000
+    # coalesce GET /api/products/{id} lookups into BatchGetProducts RPCs
+    get_product_batching: bool = True
+    get_product_batch_window_ms: float = 2.0
+    get_product_batch_max: int = 100
+    # unary reads: deadline = multiplier x observed percentile latency within
+    # [min, max] (route defaults until warmed up); a hedge goes out after the
+    # hedge percentile latency; hedges + retries capped by a token bucket
+    # earning retry_budget_ratio tokens per call
+    adaptive_deadlines: bool = True
+    deadline_percentile: float = 0.99
+    deadline_multiplier: float = 2.0
+    deadline_min_ms: float = 20.0
+    deadline_max_ms: float = 1000.0
+    hedging: bool = True
+    hedge_percentile: float = 0.95
+    hedge_min_delay_ms: float = 5.0
+    retry_budget_ratio: float = 0.1
+    retry_budget_max_tokens: float = 10.0
+
+    # share of successful catalog calls logged (unexpected failures always are)
+    telemetry_log_sample_rate: float = 0.01
+    # requests slower than this are logged with their per-stage breakdown
+    slow_request_ms: float = 500.0
+    # emit the Server-Timing header (catalog stages are prefixed "catalog-")
+    server_timing: bool = True
 
     class Config:
         env_prefix = "BFF_"
@@ -1,22 +1,292 @@
-import grpc, asyncio
+import grpc, asyncio, itertools, json
+from typing import Optional
 from .config import settings
-from . import product_pb2_grpc
-from .grpc_logging_interceptor import LoggingClientInterceptor
+from . import product_pb2, product_pb2_grpc
+from .grpc_telemetry_interceptor import TelemetryClientInterceptor
+from .resilience import ResilientCaller, RetryBudget
+from .timing import StageTimings, current_timings, stage, start_timings
 
-_channel = None
-_stub = None
+
+class OutstandingCallsInterceptor(
+    grpc.aio.UnaryUnaryClientInterceptor, grpc.aio.UnaryStreamClientInterceptor
+):
+    """Counts calls in flight on one channel (for least-outstanding picks)."""
+
+    def __init__(self) -> None:
+        self.outstanding = 0
+
+    async def _track(self, continuation, client_call_details, request):
+        self.outstanding += 1
+        try:
+            call = await continuation(client_call_details, request)
+        except BaseException:
+            self.outstanding -= 1
+            raise
+        call.add_done_callback(self._done)
+        return call
+
+    def _done(self, call) -> None:
+        self.outstanding -= 1
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        return await self._track(continuation, client_call_details, request)
+
+    async def intercept_unary_stream(self, continuation, client_call_details, request):
+        return await self._track(continuation, client_call_details, request)
+
+
+class _UnaryStreamAdapter(grpc.aio.UnaryStreamClientInterceptor):
+    # grpc.aio files an interceptor under the first kind it matches only, so
+    # an interceptor handling both kinds is registered again through this
+    def __init__(self, inner) -> None:
+        self._inner = inner
+
+    async def intercept_unary_stream(self, continuation, client_call_details, request):
+        return await self._inner.intercept_unary_stream(
+            continuation, client_call_details, request
+        )
+
+
+_SCHEMES = ("dns:", "ipv4:", "ipv6:", "unix:", "unix-abstract:", "xds:")
+
+
+def _channel_target(target: str, lb_policy: str) -> str:
+    # round_robin needs every replica address: resolve through DNS (point the
+    # target at a headless Service so it returns pod IPs, not one ClusterIP)
+    if lb_policy == "round_robin" and not target.startswith(_SCHEMES):
+        return f"dns:///{target}"
+    return target
+
+
+class CatalogChannelPool:
+    """A fixed set of channels to the catalog, each with its own connections.
+
+    HTTP/2 caps concurrent streams per connection, so spreading calls over
+    several channels raises the ceiling; ``selection`` picks a channel per
+    call ("round_robin" or "least_outstanding"). Within a channel the gRPC
+    ``lb_policy`` spreads calls over the resolved catalog replicas.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        size: int = 1,
+        selection: str = "round_robin",
+        lb_policy: str = "round_robin",
+    ) -> None:
+        if selection not in ("round_robin", "least_outstanding"):
+            raise ValueError(f"unknown channel selection: {selection}")
+        options = [
+            ("grpc.enable_retries", 1),
+            ("grpc.keepalive_time_ms", 20000),
+            # without this, channels with equal args share subchannels
+            # (and TCP connections), which would defeat the pool
+            ("grpc.use_local_subchannel_pool", 1),
+            (
+                "grpc.service_config",
+                json.dumps({"loadBalancingConfig": [{lb_policy: {}}]}),
+            ),
+        ]
+        self._counters = [OutstandingCallsInterceptor() for _ in range(size)]
+        telemetry = TelemetryClientInterceptor(
+            log_sample_rate=settings.telemetry_log_sample_rate
+        )
+        self._channels = [
+            grpc.aio.insecure_channel(
+                _channel_target(target, lb_policy),
+                options=options,
+                interceptors=[
+                    counter,
+                    _UnaryStreamAdapter(counter),
+                    telemetry,
+                    _UnaryStreamAdapter(telemetry),
+                ],
+            )
+            for counter in self._counters
+        ]
+        self._stubs = [product_pb2_grpc.CatalogServiceStub(c) for c in self._channels]
+        self._next = itertools.cycle(range(size))
+        self._least_outstanding = selection == "least_outstanding"
+
+    def stub(self) -> product_pb2_grpc.CatalogServiceStub:
+        if self._least_outstanding:
+            i = min(
+                range(len(self._stubs)), key=lambda j: self._counters[j].outstanding
+            )
+        else:
+            i = next(self._next)
+        return self._stubs[i]
+
+    def outstanding(self) -> list[int]:
+        return [c.outstanding for c in self._counters]
+
+    async def close(self) -> None:
+        await asyncio.gather(*(c.close() for c in self._channels))
+
+
+_pool: Optional[CatalogChannelPool] = None
 _lock = asyncio.Lock()
 
 
 async def get_catalog_stub() -> product_pb2_grpc.CatalogServiceStub:
-    global _channel, _stub
-    async with _lock:
-        if _stub is None:
-            interceptors = [LoggingClientInterceptor()]
-            _channel = grpc.aio.insecure_channel(
-                settings.catalog_grpc_target,
-                options=[("grpc.enable_retries", 1), ("grpc.keepalive_time_ms", 20000)],
-                interceptors=interceptors,
+    global _pool
+    # lock only while the pool is being created; afterwards a plain read
+    if _pool is None:
+        async with _lock:
+            if _pool is None:
+                _pool = CatalogChannelPool(
+                    settings.catalog_grpc_target,
+                    size=settings.catalog_channels,
+                    selection=settings.catalog_channel_selection,
+                    lb_policy=settings.catalog_lb_policy,
+                )
+    return _pool.stub()
+
+
+async def close_catalog_channels() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+class ProductBatcher:
+    """Coalesces GetProduct lookups into BatchGetProducts calls.
+
+    Lookups made within ``window_seconds`` of each other go out as one
+    BatchGetProducts RPC (at most ``max_batch`` ids); concurrent lookups of the
+    same id share one in-flight future. Ids missing from the response fail
+    with the NOT_FOUND a GetProduct call would have raised. The stage timings
+    of the shared call are added to every lookup that started the batch.
+    """
+
+    def __init__(self, window_seconds: float = 0.002, max_batch: int = 100) -> None:
+        self._window = window_seconds
+        self._max_batch = max_batch
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._pending: list[str] = []
+        # stage timings of the requests waiting on the pending batch
+        self._pending_timings: dict[int, StageTimings] = {}
+        self._stub: Optional[product_pb2_grpc.CatalogServiceStub] = None
+        self._timeout: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get(
+        self,
+        stub: product_pb2_grpc.CatalogServiceStub,
+        product_id: str,
+        timeout: Optional[float] = None,
+    ) -> product_pb2.Product:
+        fut = self._inflight.get(product_id)
+        if fut is None:
+            fut = self._enqueue(stub, product_id, timeout)
+        # shield: a cancelled caller must not cancel the lookup others share
+        with stage("batch"):
+            return await asyncio.shield(fut)
+
+    def _enqueue(self, stub, product_id: str, timeout: Optional[float]):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._inflight[product_id] = fut
+        self._pending.append(product_id)
+        timings = current_timings()
+        if timings is not None:
+            self._pending_timings[id(timings)] = timings
+        # the batch goes out on the first caller's stub, under the longest timeout
+        self._stub = self._stub or stub
+        if timeout is not None:
+            self._timeout = max(self._timeout or 0.0, timeout)
+        if len(self._pending) >= self._max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._dispatch)
+        return fut
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        ids, self._pending = self._pending, []
+        stub, self._stub = self._stub, None
+        timeout, self._timeout = self._timeout, None
+        waiting, self._pending_timings = self._pending_timings, {}
+        if not ids:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._run(stub, ids, timeout, list(waiting.values()))
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self,
+        stub,
+        ids: list[str],
+        timeout: Optional[float],
+        waiting: list[StageTimings],
+    ) -> None:
+        # time the shared call on its own, then credit every waiting request
+        batch = start_timings()
+        try:
+            resp = await catalog_calls.call(
+                stub,
+                "BatchGetProducts",
+                product_pb2.BatchGetProductsRequest(ids=ids),
+                timeout,
             )
-            _stub = product_pb2_grpc.CatalogServiceStub(_channel)
-    return _stub
+        except asyncio.CancelledError:
+            for pid in ids:
+                self._inflight.pop(pid).cancel()
+            raise
+        except Exception as e:
+            for pid in ids:
+                fut = self._inflight.pop(pid)
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            for timings in waiting:
+                timings.merge(batch)
+        found = {p.id: p for p in resp.products}
+        for pid in ids:
+            fut = self._inflight.pop(pid)
+            if fut.done():
+                continue
+            if pid in found:
+                fut.set_result(found[pid])
+            else:
+                fut.set_exception(_not_found())
+
+
+def _not_found() -> grpc.aio.AioRpcError:
+    # same error GetProduct raises, so callers map it the same way
+    return grpc.aio.AioRpcError(
+        grpc.StatusCode.NOT_FOUND,
+        grpc.aio.Metadata(),
+        grpc.aio.Metadata(),
+        details="Product not found",
+    )
+
+
+# Idempotent unary reads: adaptive deadlines, hedging, budgeted retries
+catalog_calls = ResilientCaller(
+    get_catalog_stub,
+    RetryBudget(
+        ratio=settings.retry_budget_ratio, max_tokens=settings.retry_budget_max_tokens
+    ),
+    adaptive_deadlines=settings.adaptive_deadlines,
+    deadline_percentile=settings.deadline_percentile,
+    deadline_multiplier=settings.deadline_multiplier,
+    min_deadline=settings.deadline_min_ms / 1000,
+    max_deadline=settings.deadline_max_ms / 1000,
+    hedging=settings.hedging,
+    hedge_percentile=settings.hedge_percentile,
+    min_hedge_delay=settings.hedge_min_delay_ms / 1000,
+)
+
+
+product_batcher = ProductBatcher(
+    window_seconds=settings.get_product_batch_window_ms / 1000,
+    max_batch=settings.get_product_batch_max,
+)
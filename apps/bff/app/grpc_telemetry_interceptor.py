@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import random
+import time
+import grpc
+from .telemetry import RpcMetrics, rpc_metrics
+
+logger = logging.getLogger("bff.grpc")
+
+# answered as designed: logged at the sample rate like successes
+_EXPECTED = (
+    grpc.StatusCode.OK,
+    grpc.StatusCode.NOT_FOUND,
+    grpc.StatusCode.INVALID_ARGUMENT,
+    # hedge losers are cancelled on purpose, on every hedged call
+    grpc.StatusCode.CANCELLED,
+)
+
+
+class TelemetryClientInterceptor(
+    grpc.aio.UnaryUnaryClientInterceptor, grpc.aio.UnaryStreamClientInterceptor
+):
+    """Records latency and status of every catalog call; logs only a sample.
+
+    Nothing is awaited on the call path: the outcome is read from a done
+    callback once the call has finished.
+    """
+
+    def __init__(
+        self, metrics: RpcMetrics = rpc_metrics, log_sample_rate: float = 0.01
+    ) -> None:
+        self._metrics = metrics
+        self._log_sample_rate = log_sample_rate
+        self._tasks: set[asyncio.Task] = set()
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        return await self._track(continuation, client_call_details, request)
+
+    async def intercept_unary_stream(self, continuation, client_call_details, request):
+        return await self._track(continuation, client_call_details, request)
+
+    async def _track(self, continuation, client_call_details, request):
+        start = time.perf_counter()
+        call = await continuation(client_call_details, request)
+        method = client_call_details.method
+        if isinstance(method, bytes):
+            method = method.decode()
+        method = method.rsplit("/", 1)[-1]
+        call.add_done_callback(
+            lambda done: self._on_done(done, method, time.perf_counter() - start)
+        )
+        return call
+
+    def _on_done(self, call, method: str, seconds: float) -> None:
+        # the status accessors are coroutines; the call is finished, so the
+        # task completes on its first step
+        task = asyncio.get_running_loop().create_task(
+            self._record(call, method, seconds)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _record(self, call, method: str, seconds: float) -> None:
+        code = await call.code()
+        self._metrics.observe(method, code.name, seconds)
+        if code not in _EXPECTED:
+            details = await call.details()
+            logger.warning(
+                "gRPC client error %s code=%s %.1fms: %s",
+                method,
+                code.name,
+                seconds * 1000,
+                details,
+                extra={
+                    "method": method,
+                    "code": code.name,
+                    "details": details,
+                    "seconds": seconds,
+                },
+            )
+        elif random.random() < self._log_sample_rate:
+            logger.info(
+                "gRPC client call %s code=%s %.1fms",
+                method,
+                code.name,
+                seconds * 1000,
+                extra={"method": method, "code": code.name, "seconds": seconds},
+            )
@@ -0,0 +1,103 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+from fastapi import Request, Response
+from .config import settings
+from .serialization import JsonBytesResponse
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    etag: str
+
+
+def etag_for(body: bytes) -> str:
+    # strong validator from the serialized body: equal bytes <=> equal ETag
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def cache_control() -> str:
+    if settings.cache_control_max_age <= 0:
+        return "no-cache"
+    value = f"public, max-age={settings.cache_control_max_age}"
+    if settings.cache_control_stale_while_revalidate > 0:
+        value += (
+            f", stale-while-revalidate={settings.cache_control_stale_while_revalidate}"
+        )
+    return value
+
+
+class ResponseCache:
+    """Small in-process TTL/LRU cache of serialized response bodies by URL."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._clock = clock
+        # key -> (entry, expires_at); order = recency, oldest first
+        self._entries: OrderedDict[str, tuple[CachedBody, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        item = self._entries.get(key)
+        if item is None or item[1] <= self._clock():
+            if item is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def set(self, key: str, entry: CachedBody) -> None:
+        self._entries[key] = (entry, self._clock() + self._ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+response_cache: Optional[ResponseCache] = (
+    ResponseCache(
+        settings.response_cache_max_entries, settings.response_cache_ttl_seconds
+    )
+    if settings.response_cache_enabled
+    else None
+)
+
+
+async def conditional_response(
+    request: Request, render: Callable[[], Awaitable[bytes]]
+) -> Response:
+    """Serve a cacheable GET: ETag + Cache-Control, 304 on a matching
+    If-None-Match, and ``render`` skipped entirely on a response-cache hit.
+    """
+    key = str(request.url.path) + "?" + request.url.query
+    entry = response_cache.get(key) if response_cache is not None else None
+    if entry is None:
+        body = await render()
+        entry = CachedBody(body, etag_for(body))
+        if response_cache is not None:
+            response_cache.set(key, entry)
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control()}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return JsonBytesResponse(entry.body, headers=headers)
@@ -1,7 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from .api import products
+from .config import settings
+from .grpc_catalog_client import close_catalog_channels
+from .telemetry import configure_logging, rpc_metrics
+from .timing import ServerTimingMiddleware
 
-app = FastAPI(title="BFF", version="1.0.0")
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_catalog_channels()
+
+
+app = FastAPI(title="BFF", version="1.0.0", lifespan=lifespan)
+app.add_middleware(
+    ServerTimingMiddleware,
+    slow_request_seconds=settings.slow_request_ms / 1000,
+    emit_header=settings.server_timing,
+)
 
 
 @app.get("/api/health")
@@ -9,4 +29,11 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        rpc_metrics.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 app.include_router(products.router)
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+import grpc
+from .timing import record_catalog_timing, stage
+
+logger = logging.getLogger("bff.grpc")
+
+# failures where the catalog never produced an answer: safe to re-ask a read
+RETRYABLE = (grpc.StatusCode.UNAVAILABLE,)
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies with cached percentiles."""
+
+    def __init__(
+        self, window: int = 1000, min_samples: int = 50, refresh_every: int = 32
+    ) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+        self._min_samples = min_samples
+        self._refresh_every = refresh_every
+        self._sorted: list[float] = []
+        self._since_sort = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_sort += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        # re-sorted every refresh_every samples, not on every lookup
+        if self._since_sort >= self._refresh_every or not self._sorted:
+            self._sorted = sorted(self._samples)
+            self._since_sort = 0
+        if len(self._sorted) < self._min_samples:
+            return None
+        return self._sorted[min(int(q * len(self._sorted)), len(self._sorted) - 1)]
+
+
+class RetryBudget:
+    """Token bucket shared by retries and hedges.
+
+    Every call deposits ``ratio`` tokens and every extra attempt spends one,
+    so extra attempts stay below ``ratio`` of traffic once the bucket (capped
+    at ``max_tokens``) drains -- a slow catalog cannot cause a retry storm.
+    """
+
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0) -> None:
+        self._ratio = ratio
+        self._max_tokens = max_tokens
+        self._tokens = max_tokens
+        self.spent = 0
+        self.denied = 0
+
+    def deposit(self) -> None:
+        self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def try_spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            self.spent += 1
+            return True
+        self.denied += 1
+        return False
+
+
+class ResilientCaller:
+    """Unary catalog reads with adaptive deadlines, hedging and budgeted retries.
+
+    The deadline is ``multiplier`` x the method's observed p99 latency,
+    clamped to [min, max]; until enough samples exist the caller's default
+    applies. If the first attempt is still running after the method's
+    ``hedge_percentile`` latency, a second attempt goes out on a stub from
+    ``stub_factory`` (the next pooled channel / subchannel) and the first
+    answer wins. An UNAVAILABLE attempt is retried once. Hedges and retries
+    both spend from the shared ``budget``. Only use for idempotent reads.
+    """
+
+    def __init__(
+        self,
+        stub_factory: Callable[[], Awaitable],
+        budget: RetryBudget,
+        adaptive_deadlines: bool = True,
+        deadline_percentile: float = 0.99,
+        deadline_multiplier: float = 2.0,
+        min_deadline: float = 0.02,
+        max_deadline: float = 1.0,
+        hedging: bool = True,
+        hedge_percentile: float = 0.95,
+        min_hedge_delay: float = 0.005,
+    ) -> None:
+        self._stub_factory = stub_factory
+        self.budget = budget
+        self._adaptive = adaptive_deadlines
+        self._deadline_percentile = deadline_percentile
+        self._multiplier = deadline_multiplier
+        self._min_deadline = min_deadline
+        self._max_deadline = max_deadline
+        self._hedging = hedging
+        self._hedge_percentile = hedge_percentile
+        self._min_hedge_delay = min_hedge_delay
+        self._latency: dict[str, LatencyTracker] = {}
+
+    def tracker(self, method: str) -> LatencyTracker:
+        tracker = self._latency.get(method)
+        if tracker is None:
+            tracker = self._latency[method] = LatencyTracker()
+        return tracker
+
+    def deadline(self, method: str, default: float) -> float:
+        p = self.tracker(method).percentile(self._deadline_percentile)
+        if not self._adaptive or p is None:
+            return default
+        return min(self._max_deadline, max(self._min_deadline, p * self._multiplier))
+
+    def hedge_delay(self, method: str) -> Optional[float]:
+        p = self.tracker(method).percentile(self._hedge_percentile)
+        if not self._hedging or p is None:
+            return None
+        return max(self._min_hedge_delay, p)
+
+    async def call(self, stub, method: str, request, default_timeout: float):
+        with stage("catalog"):
+            response, trailing_metadata = await self._call(
+                stub, method, request, default_timeout
+            )
+        # stage timings of the attempt that answered
+        record_catalog_timing(trailing_metadata)
+        return response
+
+    async def _call(self, stub, method: str, request, default_timeout: float):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = start + self.deadline(method, default_timeout)
+        hedge_delay = self.hedge_delay(method)
+        self.budget.deposit()
+        pending = {loop.create_task(self._attempt(stub, method, request, deadline))}
+        hedged = retried = False
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                wait = None
+                if hedge_delay is not None and not hedged:
+                    wait = max(0.0, start + hedge_delay - loop.time())
+                done, pending = await asyncio.wait(
+                    pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+                )
+                # read every exception first: one that is never read is
+                # logged as "Task exception was never retrieved"
+                outcomes = [(task, task.exception()) for task in done]
+                for task, error in outcomes:
+                    if error is None:
+                        return task.result()
+                    if not _retryable(error):
+                        raise error
+                    if not retried and loop.time() < deadline:
+                        retried = True
+                        if self.budget.try_spend():
+                            pending.add(
+                                loop.create_task(
+                                    self._attempt(None, method, request, deadline)
+                                )
+                            )
+                if not done and not hedged:
+                    hedged = True
+                    if loop.time() < deadline and self.budget.try_spend():
+                        logger.debug(
+                            "hedging catalog call %s", method, extra={"method": method}
+                        )
+                        pending.add(
+                            loop.create_task(
+                                self._attempt(None, method, request, deadline)
+                            )
+                        )
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            # consume the losers' outcomes (CancelledError or a late failure)
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _attempt(self, stub, method: str, request, deadline: float):
+        # stub=None: extra attempt, on whichever stub the pool hands out next
+        if stub is None:
+            stub = await self._stub_factory()
+        started = time.perf_counter()
+        timeout = max(0.0, deadline - asyncio.get_running_loop().time())
+        call = getattr(stub, method)(request, timeout=timeout)
+        try:
+            response = await call
+        except grpc.aio.AioRpcError as e:
+            elapsed = time.perf_counter() - started
+            if not _retryable(e) and not _shed(e, elapsed, timeout):
+                # answered (e.g. NOT_FOUND) or ran out of time: real latency
+                self.tracker(method).record(elapsed)
+            raise
+        self.tracker(method).record(time.perf_counter() - started)
+        return response, await call.trailing_metadata()
+
+
+def _shed(error: grpc.aio.AioRpcError, elapsed: float, timeout: float) -> bool:
+    # turned away by the catalog's load shedding without being served: over
+    # its concurrency limit, or a deadline drop well before our deadline
+    code = error.code()
+    return code == grpc.StatusCode.RESOURCE_EXHAUSTED or (
+        code == grpc.StatusCode.DEADLINE_EXCEEDED and elapsed < 0.9 * timeout
+    )
+
+
+def _retryable(error: BaseException) -> bool:
+    return isinstance(error, grpc.aio.AioRpcError) and error.code() in RETRYABLE
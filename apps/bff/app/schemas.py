@@ -13,3 +13,8 @@ class Product(BaseModel):
 
 class ProductList(BaseModel):
     items: List[Product]
+
+
+class ProductPage(ProductList):
+    # pass back as page_token to fetch the next page; None = last page
+    next_page_token: Optional[str] = None
@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import Iterable, Optional
+import orjson
+from fastapi import Response
+from pydantic import HttpUrl, TypeAdapter
+from .schemas import Product
+from . import product_pb2
+
+# Fast path: JSON straight from protobuf messages, skipping the pydantic models.
+# Field mapping computed once from the schema, so the wire format (and the
+# OpenAPI schema still declared through response_model) stays the same.
+_SCALAR_FIELDS = tuple(f for f in Product.model_fields if f != "image_url")
+
+_http_url = TypeAdapter(HttpUrl)
+
+
+@lru_cache(maxsize=65536)
+def _image_url(url: str) -> Optional[str]:
+    # the one validation left on this path; "" = unset in proto3
+    if not url:
+        return None
+    return str(_http_url.validate_python(url))
+
+
+def product_dict(p: product_pb2.Product) -> dict:
+    d = {name: getattr(p, name) for name in _SCALAR_FIELDS}
+    d["image_url"] = _image_url(p.image_url)
+    return d
+
+
+def product_json(p: product_pb2.Product) -> bytes:
+    return orjson.dumps(product_dict(p))
+
+
+def product_list_json(products: Iterable[product_pb2.Product], **extra) -> bytes:
+    # extra: any further top-level fields, e.g. ProductPage.next_page_token
+    return orjson.dumps({"items": [product_dict(p) for p in products], **extra})
+
+
+def ndjson_lines(products: Iterable[product_pb2.Product]) -> bytes:
+    return b"".join(
+        orjson.dumps(product_dict(p), option=orjson.OPT_APPEND_NEWLINE)
+        for p in products
+    )
+
+
+class JsonBytesResponse(Response):
+    # body is already serialized; FastAPI skips response_model for Responses
+    media_type = "application/json"
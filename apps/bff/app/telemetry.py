@@ -0,0 +1,110 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Sequence
+
+# seconds; upper bounds of the fixed histogram buckets (+Inf implied)
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus semantics, cumulative on render)."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total = 0
+        out = []
+        for bound, n in zip((*map(repr, self.bounds), "+Inf"), self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class RpcMetrics:
+    """Per-method latency histograms and per-(method, code) call counters."""
+
+    def __init__(self, prefix: str) -> None:
+        self._prefix = prefix
+        self._latency: dict[str, Histogram] = {}
+        self._handled: defaultdict[tuple[str, str], int] = defaultdict(int)
+
+    def observe(self, method: str, code: str, seconds: float) -> None:
+        hist = self._latency.get(method)
+        if hist is None:
+            hist = self._latency[method] = Histogram()
+        hist.observe(seconds)
+        self._handled[(method, code)] += 1
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        name = f"{self._prefix}_handling_seconds"
+        lines = [
+            f"# HELP {name} RPC latency by method.",
+            f"# TYPE {name} histogram",
+        ]
+        for method, hist in sorted(self._latency.items()):
+            label = f'grpc_method="{method}"'
+            for bound, total in hist.cumulative():
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {total}')
+            lines.append(f"{name}_sum{{{label}}} {hist.sum}")
+            lines.append(f"{name}_count{{{label}}} {hist.count}")
+        name = f"{self._prefix}_handled_total"
+        lines += [
+            f"# HELP {name} Completed RPCs by method and status code.",
+            f"# TYPE {name} counter",
+        ]
+        for (method, code), n in sorted(self._handled.items()):
+            lines.append(f'{name}{{grpc_method="{method}",grpc_code="{code}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+rpc_metrics = RpcMetrics("grpc_client")
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """Route all logging through a queue so emitting never blocks on stdout.
+
+    Records are formatted and written by a QueueListener thread.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+    )
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+    listener.start()
+    atexit.register(listener.stop)
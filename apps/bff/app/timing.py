@@ -0,0 +1,146 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+logger = logging.getLogger("bff.timing")
+
+# gRPC trailing metadata the catalog sends its own stage timings in
+CATALOG_TIMING_KEY = "catalog-timing"
+
+
+class StageTimings:
+    """Time spent per named stage (catalog, serialize, ...) of one request.
+
+    Durations of a stage that runs several times add up; stages may overlap
+    (``catalog`` spans the ``catalog-*`` stages reported by the catalog).
+    """
+
+    __slots__ = ("stages", "started")
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, other: "StageTimings") -> None:
+        for name, seconds in other.stages.items():
+            self.add(name, seconds)
+
+    def add_header(self, header: str, prefix: str = "") -> None:
+        # parses "sql;dur=1.204, hydrate;dur=0.081" (durations in ms)
+        for entry in header.split(","):
+            name, _, params = entry.strip().partition(";")
+            for param in params.split(";"):
+                key, _, value = param.strip().partition("=")
+                if key == "dur" and name:
+                    try:
+                        self.add(prefix + name, float(value) / 1000)
+                    except ValueError:
+                        pass
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_millis(self) -> dict[str, float]:
+        return {name: round(s * 1000, 3) for name, s in self.stages.items()}
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.as_millis().items())
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar(
+    "bff_stage_timings", default=None
+)
+
+
+def start_timings() -> StageTimings:
+    """Start collecting stages for the request running in this context."""
+    timings = StageTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[StageTimings]:
+    return _current.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def record_catalog_timing(trailing_metadata) -> None:
+    # catalog stages show up as catalog-sql, catalog-pool, ...
+    timings = _current.get()
+    if timings is None or not trailing_metadata:
+        return
+    for key, value in trailing_metadata:
+        if key == CATALOG_TIMING_KEY:
+            timings.add_header(value, prefix="catalog-")
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware: per-request stage timings as a ``Server-Timing`` header.
+
+    The header is added when the response starts (for streams that is time
+    to first byte); requests slower than ``slow_request_seconds`` in total
+    are logged with every stage.
+    """
+
+    def __init__(
+        self, app, slow_request_seconds: float = 0.5, emit_header: bool = True
+    ) -> None:
+        self.app = app
+        self._slow_request_seconds = slow_request_seconds
+        self._emit_header = emit_header
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings = start_timings()
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self._emit_header:
+                    timings.add("total", timings.elapsed())
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"server-timing", timings.header().encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            seconds = timings.elapsed()
+            if seconds >= self._slow_request_seconds:
+                # the installed formatter prints the message only, not extras
+                logger.warning(
+                    "slow request %s %s status=%s total=%.1fms stages: %s",
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    seconds * 1000,
+                    timings.header(),
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "seconds": seconds,
+                        "stages_ms": timings.as_millis(),
+                    },
+                )
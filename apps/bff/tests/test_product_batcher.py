@@ -0,0 +1,115 @@
+import asyncio
+import grpc
+import pytest
+from app import grpc_catalog_client, product_pb2
+from app.grpc_catalog_client import ProductBatcher
+
+
+class FakeCatalogCalls:
+    """Stands in for catalog_calls: answers BatchGetProducts from ``known``."""
+
+    def __init__(self, known=("a", "b", "c"), error=None) -> None:
+        self.known = set(known)
+        self.error = error
+        self.requests: list[list[str]] = []
+        self.release = asyncio.Event()
+        self.block = False
+
+    async def call(self, stub, method, request, timeout):
+        assert method == "BatchGetProducts"
+        self.requests.append(list(request.ids))
+        if self.block:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return product_pb2.BatchGetProductsResponse(
+            products=[
+                product_pb2.Product(id=pid) for pid in request.ids if pid in self.known
+            ]
+        )
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    fake = FakeCatalogCalls()
+    monkeypatch.setattr(grpc_catalog_client, "catalog_calls", fake)
+    return fake
+
+
+def test_lookups_share_one_batch(catalog):
+    async def run():
+        batcher = ProductBatcher(window_seconds=0.001)
+        return await asyncio.gather(
+            batcher.get(None, "a"), batcher.get(None, "b"), batcher.get(None, "a")
+        )
+
+    products = asyncio.run(run())
+
+    assert [p.id for p in products] == ["a", "b", "a"]
+    assert catalog.requests == [["a", "b"]]
+
+
+def test_missing_id_fails_with_not_found(catalog):
+    async def run():
+        batcher = ProductBatcher(window_seconds=0.001)
+        return await asyncio.gather(
+            batcher.get(None, "a"), batcher.get(None, "zzz"), return_exceptions=True
+        )
+
+    found, missing = asyncio.run(run())
+
+    assert found.id == "a"
+    assert isinstance(missing, grpc.aio.AioRpcError)
+    assert missing.code() == grpc.StatusCode.NOT_FOUND
+
+
+def test_batch_error_reaches_every_lookup(catalog):
+    catalog.error = RuntimeError("catalog down")
+
+    async def run():
+        batcher = ProductBatcher(window_seconds=0.001)
+        results = await asyncio.gather(
+            batcher.get(None, "a"), batcher.get(None, "b"), return_exceptions=True
+        )
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher._inflight == {}
+
+
+def test_cancelled_lookup_does_not_cancel_the_batch(catalog):
+    catalog.block = True
+
+    async def run():
+        batcher = ProductBatcher(window_seconds=0.001)
+        first = asyncio.create_task(batcher.get(None, "a"))
+        second = asyncio.create_task(batcher.get(None, "a"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        catalog.release.set()
+        return first, await second
+
+    first, product = asyncio.run(run())
+
+    assert first.cancelled()
+    assert product.id == "a"
+
+
+def test_cancelled_batch_cancels_its_lookups(catalog):
+    catalog.block = True
+
+    async def run():
+        batcher = ProductBatcher(window_seconds=0.001)
+        lookup = asyncio.create_task(batcher.get(None, "a"))
+        await asyncio.sleep(0.01)
+        for task in list(batcher._tasks):
+            task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await lookup
+        return batcher
+
+    batcher = asyncio.run(run())
+
+    assert batcher._inflight == {}
@@ -0,0 +1,139 @@
+import asyncio
+import grpc
+import pytest
+from app.resilience import LatencyTracker, ResilientCaller, RetryBudget
+
+
+def rpc_error(code: grpc.StatusCode) -> grpc.aio.AioRpcError:
+    return grpc.aio.AioRpcError(code, grpc.aio.Metadata(), grpc.aio.Metadata())
+
+
+class FakeCall:
+    def __init__(self, outcome, delay: float) -> None:
+        self._outcome = outcome
+        self._delay = delay
+
+    def __await__(self):
+        return self._run().__await__()
+
+    async def _run(self):
+        await asyncio.sleep(self._delay)
+        if isinstance(self._outcome, BaseException):
+            raise self._outcome
+        return self._outcome
+
+    async def trailing_metadata(self):
+        return ()
+
+
+class FakeStub:
+    """``GetProduct`` answers with the next (outcome, delay) in ``script``."""
+
+    def __init__(self, script) -> None:
+        self._script = list(script)
+        self.calls = 0
+        self.timeouts: list[float] = []
+
+    def GetProduct(self, request, timeout):
+        self.calls += 1
+        self.timeouts.append(timeout)
+        return FakeCall(*self._script.pop(0))
+
+
+def caller_for(stub: FakeStub, **kwargs) -> ResilientCaller:
+    async def stub_factory():
+        return stub
+
+    return ResilientCaller(stub_factory, RetryBudget(), **kwargs)
+
+
+def warm(caller: ResilientCaller, seconds: float, n: int = 100) -> None:
+    for _ in range(n):
+        caller.tracker("GetProduct").record(seconds)
+
+
+def test_latency_tracker_needs_enough_samples():
+    tracker = LatencyTracker(min_samples=10)
+    for i in range(9):
+        tracker.record(i / 100)
+    assert tracker.percentile(0.5) is None
+
+    for i in range(9, 100):
+        tracker.record(i / 100)
+    assert tracker.percentile(0.99) == pytest.approx(0.99)
+
+
+def test_retry_budget_caps_extra_attempts():
+    budget = RetryBudget(ratio=0.1, max_tokens=2)
+    assert budget.try_spend() and budget.try_spend()
+    assert not budget.try_spend()
+
+    for _ in range(11):
+        budget.deposit()
+    assert budget.try_spend()
+    assert budget.denied == 1
+
+
+def test_adaptive_deadline_is_clamped():
+    caller = caller_for(FakeStub([]), min_deadline=0.02, max_deadline=1.0)
+    assert caller.deadline("GetProduct", 0.5) == 0.5
+
+    warm(caller, 0.001)
+    assert caller.deadline("GetProduct", 0.5) == 0.02
+    warm(caller, 5.0, n=1000)
+    assert caller.deadline("GetProduct", 0.5) == 1.0
+
+
+def test_hedge_answers_when_the_first_attempt_is_slow():
+    stub = FakeStub([("slow", 1.0), ("fast", 0.0)])
+    caller = caller_for(stub, min_hedge_delay=0.0, max_deadline=5.0)
+    warm(caller, 0.01)
+
+    result = asyncio.run(caller.call(stub, "GetProduct", None, 5.0))
+
+    assert result == "fast"
+    assert stub.calls == 2
+    assert caller.budget.spent == 1
+
+
+def test_unavailable_is_retried_once():
+    unavailable = rpc_error(grpc.StatusCode.UNAVAILABLE)
+    stub = FakeStub([(unavailable, 0.0), ("ok", 0.0)])
+    caller = caller_for(stub, hedging=False)
+
+    assert asyncio.run(caller.call(stub, "GetProduct", None, 1.0)) == "ok"
+
+    stub = FakeStub([(unavailable, 0.0), (unavailable, 0.0), ("ok", 0.0)])
+    caller = caller_for(stub, hedging=False)
+    with pytest.raises(grpc.aio.AioRpcError):
+        asyncio.run(caller.call(stub, "GetProduct", None, 1.0))
+    assert stub.calls == 2
+
+
+def test_answered_errors_are_not_retried():
+    stub = FakeStub([(rpc_error(grpc.StatusCode.NOT_FOUND), 0.0), ("ok", 0.0)])
+    caller = caller_for(stub, hedging=False)
+
+    with pytest.raises(grpc.aio.AioRpcError) as error:
+        asyncio.run(caller.call(stub, "GetProduct", None, 1.0))
+
+    assert error.value.code() == grpc.StatusCode.NOT_FOUND
+    assert stub.calls == 1
+
+
+def test_shed_calls_are_not_recorded_as_latency():
+    stub = FakeStub(
+        [
+            (rpc_error(grpc.StatusCode.RESOURCE_EXHAUSTED), 0.0),
+            (rpc_error(grpc.StatusCode.DEADLINE_EXCEEDED), 0.0),
+            (rpc_error(grpc.StatusCode.NOT_FOUND), 0.0),
+        ]
+    )
+    caller = caller_for(stub, hedging=False)
+
+    for _ in range(3):
+        with pytest.raises(grpc.aio.AioRpcError):
+            asyncio.run(caller.call(stub, "GetProduct", None, 1.0))
+
+    # only the NOT_FOUND was an answer
+    assert len(caller.tracker("GetProduct")._samples) == 1
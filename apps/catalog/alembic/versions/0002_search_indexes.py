@@ -0,0 +1,45 @@
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+# revision identifiers
+revision = "0002_search_indexes"
+down_revision = "0001_init"
+branch_labels = None
+depends_on = None
+
+SEARCH_TSV = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    # stored generated column: rewrites the table once, then kept up to date by PG
+    op.add_column(
+        "products",
+        sa.Column("search_tsv", TSVECTOR(), sa.Computed(SEARCH_TSV, persisted=True)),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_products_search_tsv",
+            "products",
+            ["search_tsv"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_products_title_trgm",
+            "products",
+            ["title"],
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_title_trgm", table_name="products")
+    op.drop_index("ix_products_search_tsv", table_name="products")
+    op.drop_column("products", "search_tsv")
@@ -0,0 +1,38 @@
+from alembic import context, op
+
+# revision identifiers
+revision = "0003_embedding_ann_index"
+down_revision = "0002_search_indexes"
+branch_labels = None
+depends_on = None
+
+# Build parameters come from -x arguments, e.g.
+#   alembic -x vector_index=hnsw -x hnsw_m=16 -x hnsw_ef_construction=64 upgrade head
+#   alembic -x vector_index=ivfflat -x ivfflat_lists=1000 upgrade head
+# The operator class matches the <-> (L2) ordering used by VectorSearchStrategy.
+
+
+def _x(name: str, default: str) -> str:
+    return context.get_x_argument(as_dictionary=True).get(name, default)
+
+
+def upgrade() -> None:
+    index_type = _x("vector_index", "hnsw")
+    if index_type == "hnsw":
+        m = int(_x("hnsw_m", "16"))
+        ef_construction = int(_x("hnsw_ef_construction", "64"))
+        using = f"hnsw (embedding vector_l2_ops) WITH (m = {m}, ef_construction = {ef_construction})"
+    elif index_type == "ivfflat":
+        # build after loading data: IVFFlat picks its centroids from existing rows
+        lists = int(_x("ivfflat_lists", "100"))
+        using = f"ivfflat (embedding vector_l2_ops) WITH (lists = {lists})"
+    else:
+        raise ValueError(f"unknown vector_index {index_type!r} (hnsw|ivfflat)")
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"CREATE INDEX CONCURRENTLY ix_products_embedding_ann ON products USING {using}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_embedding_ann", table_name="products")
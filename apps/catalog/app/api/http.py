@@ -1,8 +1,91 @@
-from fastapi import APIRouter
+import asyncio
+import logging
+import httpx
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from ..db import pool_stats
+from ..domain.events import domain_events
+from ..domain.hotkeys import hot_products
+from ..grpc.concurrency_interceptor import concurrency_limit
+from ..infrastructure.repositories import product_cache, search_results
+from ..services.embeddings import embedding_cache
+from ..supervisor import worker_http_ports
+from ..telemetry import merge_expositions, rpc_metrics
+from ..warmup import readiness
+
+logger = logging.getLogger("catalog.http")
 
 router = APIRouter()
 
 
 @router.get("/api/health")
 async def health():
+    # same readiness as the gRPC health service: 503 until warm-up is done
+    # on every worker of the pod
+    if not readiness.pod_ready:
+        return JSONResponse({"status": "warming"}, status_code=503)
     return {"status": "ok"}
+
+
+@router.get("/api/cache/stats")
+async def cache_stats():
+    return {
+        "products": product_cache.stats(),
+        "embeddings": embedding_cache.stats(),
+        "search_results": search_results.stats(),
+    }
+
+
+@router.get("/api/db/pool")
+async def db_pool_stats():
+    return pool_stats()
+
+
+@router.get("/api/events/stats")
+async def events_stats():
+    return domain_events.stats()
+
+
+@router.get("/api/concurrency")
+async def concurrency_stats():
+    return concurrency_limit.stats()
+
+
+@router.get("/api/hotkeys")
+async def hotkeys(limit: int = Query(50, ge=1, le=1000)):
+    return {
+        "top": [{"id": pid, "count": count} for pid, count in hot_products.top(limit)],
+        "stats": hot_products.stats(),
+    }
+
+
+# the stats routes above describe the worker that answers; under the
+# supervisor ask a given worker on its own port (worker_http_port_base + slot)
+
+
+async def _worker_metrics(client: httpx.AsyncClient, port: int) -> str:
+    response = await client.get(f"http://127.0.0.1:{port}/metrics?local=true")
+    response.raise_for_status()
+    return response.text
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(local: bool = False):
+    # under the supervisor: every worker's metrics, labelled with its slot
+    ports = worker_http_ports()
+    if local or not ports:
+        text = rpc_metrics.render()
+    else:
+        async with httpx.AsyncClient(timeout=2.0) as client:
+            results = await asyncio.gather(
+                *(_worker_metrics(client, port) for port in ports),
+                return_exceptions=True,
+            )
+        expositions = {}
+        for slot, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.warning("metrics of worker %s unavailable: %r", slot, result)
+            else:
+                expositions[str(slot)] = result
+        text = merge_expositions(expositions)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
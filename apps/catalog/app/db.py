@@ -1,16 +1,89 @@
+import time
+from dataclasses import dataclass
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
+from .timing import record
+
+
+@dataclass
+class PoolMetrics:
+    acquires: int = 0
+    acquire_timeouts: int = 0
+    acquire_wait_seconds_total: float = 0.0
+    acquire_wait_seconds_max: float = 0.0
+    connects: int = 0
+    recycled: int = 0
+
+    def observe_acquire(self, seconds: float) -> None:
+        self.acquires += 1
+        self.acquire_wait_seconds_total += seconds
+        if seconds > self.acquire_wait_seconds_max:
+            self.acquire_wait_seconds_max = seconds
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waits."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_metrics.acquire_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            pool_metrics.observe_acquire(waited)
+            # checkout happens inside a session's first statement, so this
+            # wait is also part of that statement's "sql" stage
+            record("pool", waited)
+
 
 engine = create_async_engine(
     str(settings.db_url),
-    pool_size=20,
-    max_overflow=20,
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
     pool_timeout=5,
     pool_recycle=1800,
     echo=False,
 )
 
+
+@event.listens_for(engine.sync_engine.pool, "connect")
+def _on_connect(dbapi_connection, connection_record) -> None:
+    pool_metrics.connects += 1
+    # record_info survives reconnects of the same pool slot (recycle/invalidate)
+    if connection_record.record_info.get("connected"):
+        pool_metrics.recycled += 1
+    connection_record.record_info["connected"] = True
+
+
+def pool_stats() -> dict:
+    pool = engine.sync_engine.pool
+    acquires = pool_metrics.acquires
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow_in_use": max(pool.overflow(), 0),
+        "acquires": acquires,
+        "acquire_timeouts": pool_metrics.acquire_timeouts,
+        "acquire_wait_seconds_avg": (
+            pool_metrics.acquire_wait_seconds_total / acquires if acquires else 0.0
+        ),
+        "acquire_wait_seconds_max": pool_metrics.acquire_wait_seconds_max,
+        "connects": pool_metrics.connects,
+        "recycled": pool_metrics.recycled,
+    }
+
+
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
     expire_on_commit=False,
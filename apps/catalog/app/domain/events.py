@@ -1,28 +1,189 @@
+import asyncio
+import logging
 from collections import defaultdict
-from typing import Callable, Dict, List, Any
+from typing import Callable, Dict, Iterable, List, Any, Optional
+from ..config import settings
+from .hotkeys import hot_products
 
 EventHandler = Callable[[Any], None]
+BatchEventHandler = Callable[[List[Any]], None]
+
+logger = logging.getLogger("catalog.events")
+
+OVERFLOW_POLICIES = ("drop", "sample", "block")
 
 
 class DomainEvents:
-    def __init__(self) -> None:
+    """In-process event bus.
+
+    Until ``start()`` is called (and after ``stop()``) events are dispatched
+    inline, as before. Once started, ``publish``/``publish_many`` only append
+    to a bounded queue and a background task hands the queued events to the
+    handlers in batches every ``flush_interval`` seconds, so handler cost
+    never lands on the publisher.
+
+    When ``max_pending`` events are already queued the overflow policy
+    applies: "drop" discards new events, "sample" keeps one in
+    ``sample_every`` of them (over the bound), and "block" makes the
+    publisher flush the queue itself, inline, so nothing is lost.
+
+    Events named in ``inline_events`` (cache invalidation and anything else
+    correctness depends on) always dispatch inline and are never dropped.
+    """
+
+    def __init__(
+        self,
+        max_pending: int = 100_000,
+        overflow: str = "drop",
+        flush_interval: float = 0.05,
+        max_batch: int = 5000,
+        sample_every: int = 10,
+        inline_events: Iterable[str] = (),
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy: {overflow}")
         self._handlers: Dict[str, List[EventHandler]] = defaultdict(list)
+        self._batch_handlers: Dict[str, List[BatchEventHandler]] = defaultdict(list)
+        self._max_pending = max_pending
+        self._overflow = overflow
+        self._flush_interval = flush_interval
+        self._max_batch = max_batch
+        self._sample_every = sample_every
+        self._inline_events = frozenset(inline_events)
+        # (event_name, payloads) in publish order; _pending_count = total payloads
+        self._pending: List[tuple[str, List[Any]]] = []
+        self._pending_count = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._published = 0
+        self._dropped = 0
+        self._flushes = 0
+        self._handler_errors = 0
 
     def register(self, event_name: str, handler: EventHandler) -> None:
         self._handlers[event_name].append(handler)
 
+    def register_batch(self, event_name: str, handler: BatchEventHandler) -> None:
+        """Register a handler that receives a list of payloads per flush."""
+        self._batch_handlers[event_name].append(handler)
+
     def publish(self, event_name: str, payload: Any) -> None:
-        for handler in self._handlers[event_name]:
-            handler(payload)
+        self.publish_many(event_name, (payload,))
+
+    def publish_many(self, event_name: str, payloads: Iterable[Any]) -> None:
+        payloads = list(payloads)
+        if not payloads:
+            return
+        self._published += len(payloads)
+        if self._task is None or event_name in self._inline_events:
+            self._dispatch(event_name, payloads)
+            return
+        room = self._max_pending - self._pending_count
+        if len(payloads) > room:
+            if self._overflow == "block":
+                self.flush()
+                if len(payloads) > self._max_pending:
+                    self._dispatch(event_name, payloads)
+                    return
+            else:
+                kept = payloads[: max(room, 0)]
+                if self._overflow == "sample":
+                    kept += payloads[max(room, 0) :: self._sample_every]
+                self._dropped += len(payloads) - len(kept)
+                payloads = kept
+                if not payloads:
+                    return
+        if not self._pending:
+            self._wakeup.set()
+        self._pending.append((event_name, payloads))
+        self._pending_count += len(payloads)
+
+    def flush(self) -> None:
+        """Hand every queued event to its handlers now, in the caller."""
+        pending, self._pending = self._pending, []
+        self._pending_count = 0
+        if not pending:
+            return
+        self._flushes += 1
+        grouped: Dict[str, List[Any]] = defaultdict(list)
+        for event_name, payloads in pending:
+            grouped[event_name].extend(payloads)
+        for event_name, payloads in grouped.items():
+            for start in range(0, len(payloads), self._max_batch):
+                self._dispatch(event_name, payloads[start : start + self._max_batch])
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "overflow": self._overflow,
+            "published": self._published,
+            "dropped": self._dropped,
+            "pending": self._pending_count,
+            "flushes": self._flushes,
+            "handler_errors": self._handler_errors,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # let a batch build up before handing it out
+            await asyncio.sleep(self._flush_interval)
+            self.flush()
+
+    def _dispatch(self, event_name: str, payloads: List[Any]) -> None:
+        # a failing handler must not break the publisher or other handlers
+        for batch_handler in self._batch_handlers.get(event_name, ()):
+            try:
+                batch_handler(payloads)
+            except Exception:
+                self._handler_errors += 1
+                logger.exception(
+                    "%s event handler failed", event_name, extra={"event": event_name}
+                )
+        for handler in self._handlers.get(event_name, ()):
+            for payload in payloads:
+                try:
+                    handler(payload)
+                except Exception:
+                    self._handler_errors += 1
+                    logger.exception(
+                        "%s event handler failed",
+                        event_name,
+                        extra={"event": event_name},
+                    )
 
 
-domain_events = DomainEvents()
+domain_events = DomainEvents(
+    max_pending=settings.events_max_pending,
+    overflow=settings.events_overflow,
+    flush_interval=settings.events_flush_interval_ms / 1000,
+    max_batch=settings.events_max_batch,
+    sample_every=settings.events_sample_every,
+    # invalidates product_cache and search results: must never be dropped
+    inline_events=("product_changed",),
+)
 
 
-# Example usage: log when a product is loaded (for metrics)
-def on_product_read(event):
-    # Push to metrics / logs, etc.
-    pass
+# product_read payloads are bare product ids, published per result set;
+# the hot-key tracker feeds cache admission/warming and /api/hotkeys
+def on_product_read(product_ids):
+    hot_products.record_many(product_ids)
 
 
-domain_events.register("product_read", on_product_read)
+domain_events.register_batch("product_read", on_product_read)
@@ -0,0 +1,163 @@
+import heapq
+import random
+import time
+from array import array
+from collections import Counter
+from typing import Callable, Hashable, Iterable
+from ..config import settings
+
+# Mersenne prime for the pairwise-independent row hashes
+_PRIME = (1 << 61) - 1
+
+
+class CountMinSketch:
+    """Approximate per-key counts in ``width * depth`` float counters.
+
+    Estimates never undercount; they overcount by at most ~e/width of the
+    total with probability 1 - e^-depth. Counters are floats so they can be
+    decayed in place.
+    """
+
+    def __init__(self, width: int = 4096, depth: int = 4, seed: int = 0) -> None:
+        rnd = random.Random(seed)
+        self._width = width
+        self._rows = [array("d", bytes(8 * width)) for _ in range(depth)]
+        self._hashes = [
+            (rnd.randrange(1, _PRIME), rnd.randrange(_PRIME)) for _ in range(depth)
+        ]
+
+    def _cells(self, key: Hashable):
+        h = hash(key)
+        for row, (a, b) in zip(self._rows, self._hashes):
+            yield row, (a * h + b) % _PRIME % self._width
+
+    def add(self, key: Hashable, count: float = 1.0) -> float:
+        # conservative update: raise only the cells below the new estimate
+        cells = list(self._cells(key))
+        estimate = min(row[i] for row, i in cells) + count
+        for row, i in cells:
+            if row[i] < estimate:
+                row[i] = estimate
+        return estimate
+
+    def estimate(self, key: Hashable) -> float:
+        return min(row[i] for row, i in self._cells(key))
+
+    def scale(self, factor: float) -> None:
+        for row in self._rows:
+            for i in range(len(row)):
+                row[i] *= factor
+
+    def nbytes(self) -> int:
+        return sum(row.itemsize * len(row) for row in self._rows)
+
+
+class HotKeys:
+    """Heavy hitters over a time-decayed window: count-min sketch + top-K heap.
+
+    Every ``window_seconds`` all counts are multiplied by ``decay``, so a key's
+    count is an exponentially weighted read rate and yesterday's hot items
+    fall out. Memory is fixed: the sketch plus at most ``k`` tracked keys.
+    """
+
+    def __init__(
+        self,
+        k: int = 1000,
+        width: int = 4096,
+        depth: int = 4,
+        window_seconds: float = 60.0,
+        decay: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._k = k
+        self._sketch = CountMinSketch(width, depth)
+        self._window = window_seconds
+        self._decay = decay
+        self._clock = clock
+        self._window_start = clock()
+        # key -> estimate for the current top-K; heap holds (estimate, key)
+        # entries, possibly stale (lazily skipped when they surface)
+        self._top: dict[Hashable, float] = {}
+        self._heap: list[tuple[float, Hashable]] = []
+        self._recorded = 0
+
+    def record_many(self, keys: Iterable[Hashable]) -> None:
+        self._maybe_decay()
+        for key, n in Counter(keys).items():
+            self._recorded += n
+            self._offer(key, self._sketch.add(key, n))
+
+    def record(self, key: Hashable) -> None:
+        self.record_many((key,))
+
+    def estimate(self, key: Hashable) -> float:
+        self._maybe_decay()
+        return self._sketch.estimate(key)
+
+    def top(self, n: int = 100) -> list[tuple[Hashable, float]]:
+        self._maybe_decay()
+        return sorted(self._top.items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+    def admit(self, key: Hashable, min_count: float) -> bool:
+        # cache admission: only keys with a recent read rate get in when full
+        return key in self._top or self.estimate(key) >= min_count
+
+    def stats(self) -> dict:
+        return {
+            "tracked": len(self._top),
+            "k": self._k,
+            "recorded": self._recorded,
+            "window_seconds": self._window,
+            "decay": self._decay,
+            "sketch_bytes": self._sketch.nbytes(),
+        }
+
+    def _offer(self, key: Hashable, estimate: float) -> None:
+        if key in self._top:
+            self._top[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        elif len(self._top) < self._k:
+            self._top[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        else:
+            floor_estimate, floor_key = self._floor()
+            if estimate <= floor_estimate:
+                return
+            heapq.heappop(self._heap)
+            del self._top[floor_key]
+            self._top[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        if len(self._heap) > 4 * self._k:
+            self._rebuild_heap()
+
+    def _floor(self) -> tuple[float, Hashable]:
+        # smallest live entry; drop entries superseded by a later push
+        while True:
+            estimate, key = self._heap[0]
+            if self._top.get(key) == estimate:
+                return estimate, key
+            heapq.heappop(self._heap)
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(estimate, key) for key, estimate in self._top.items()]
+        heapq.heapify(self._heap)
+
+    def _maybe_decay(self) -> None:
+        windows = int((self._clock() - self._window_start) // self._window)
+        if windows <= 0:
+            return
+        self._window_start += windows * self._window
+        factor = self._decay**windows
+        self._sketch.scale(factor)
+        self._top = {key: estimate * factor for key, estimate in self._top.items()}
+        self._rebuild_heap()
+
+
+# Fed by product_read events (see domain/events.py)
+hot_products = HotKeys(
+    k=settings.hotkeys_top_k,
+    width=settings.hotkeys_sketch_width,
+    depth=settings.hotkeys_sketch_depth,
+    window_seconds=settings.hotkeys_window_seconds,
+    decay=settings.hotkeys_decay,
+)
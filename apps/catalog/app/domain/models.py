@@ -1,6 +1,8 @@
-from typing import Optional, List
+from dataclasses import dataclass, field
+from typing import Any, Optional, List
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Float, Text
+from sqlalchemy import String, Float, Text, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from pgvector.sqlalchemy import Vector
 from ..db import Base
 
@@ -14,6 +16,38 @@ class Product(Base):
     price: Mapped[float] = mapped_column(Float, nullable=False)
     currency: Mapped[str] = mapped_column(String(8), nullable=False, default="USD")
     image_url: Mapped[Optional[str]] = mapped_column(String(512))
+    # ~6 KB per row; deferred so ORM loads only fetch it when accessed
     embedding: Mapped[Optional[List[float]]] = mapped_column(
-        Vector(dim=1536), nullable=True
+        Vector(dim=1536), nullable=True, deferred=True
     )
+    # generated by Postgres (0002_search_indexes), GIN-indexed for keyword search
+    search_tsv: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ProductView:
+    """Read model of a product: the columns read paths serialize, no embedding."""
+
+    id: str
+    title: str
+    description: Optional[str]
+    price: float
+    currency: str
+    image_url: Optional[str]
+
+
+@dataclass
+class SearchPage:
+    """One page of ranked search results and the keyset cursor after it."""
+
+    products: list[ProductView]
+    next_cursor: Any = None  # JSON-serializable; None when there are no more pages
+    cursors: list[Any] = field(default_factory=list)  # position after each product
@@ -1,12 +1,12 @@
 from abc import ABC, abstractmethod
 from typing import Sequence, Optional
-from .models import Product
+from .models import ProductView
 
 
 class ProductRepository(ABC):
     @abstractmethod
-    async def get(self, product_id: str) -> Optional[Product]: ...
+    async def get(self, product_id: str) -> Optional[ProductView]: ...
     @abstractmethod
-    async def batch_get(self, ids: list[str]) -> Sequence[Product]: ...
+    async def batch_get(self, ids: list[str]) -> Sequence[ProductView]: ...
     @abstractmethod
-    async def search(self, query: str, limit: int = 20) -> Sequence[Product]: ...
+    async def search(self, query: str, limit: int = 20) -> Sequence[ProductView]: ...
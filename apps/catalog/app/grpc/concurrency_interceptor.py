@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Awaitable, Callable, Optional
+import grpc
+from grpc.aio import ServerInterceptor
+from ..config import settings
+from ..warmup import readiness
+
+logger = logging.getLogger("catalog.grpc")
+
+SERVICE_PREFIX = "/catalog.v1.CatalogService/"
+
+# may use the whole limit; every other CatalogService RPC (search, exports)
+# only low_priority_share of it, so searches are shed before point reads
+HIGH_PRIORITY = frozenset({"GetProduct", "BatchGetProducts"})
+
+# samples per method before its service time is trusted for deadline drops
+_MIN_SAMPLES = 20
+
+# a dropped call gives no sample, so each drop shrinks the estimate instead:
+# after a latency spike the estimate falls until calls are admitted again
+_DROP_DECAY = 0.95
+
+
+class GradientLimit:
+    """Concurrency limit driven by the ratio of long-term to recent latency.
+
+    While recent latency stays within ``tolerance`` x the long-term baseline
+    the limit grows by about ``smoothing`` x sqrt(limit) per sample; when
+    latency rises (e.g. requests start queueing on the DB pool) it shrinks
+    in proportion. The gradient is floored at 0.5 and smoothed, so one
+    sample cuts the limit by at most about ``smoothing`` / 2 (10%). Samples
+    taken while less than half the limit is in use are ignored: they say
+    nothing about a higher limit.
+    """
+
+    def __init__(
+        self,
+        initial: int = 100,
+        min_limit: int = 10,
+        max_limit: int = 1000,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        long_window: int = 600,
+        short_window: int = 10,
+    ) -> None:
+        self.limit = float(initial)
+        self._min = min_limit
+        self._max = max_limit
+        self._tolerance = tolerance
+        self._smoothing = smoothing
+        self._long_window = long_window
+        self._short_window = short_window
+        self._long_rtt: Optional[float] = None
+        self._short_rtt = 0.0
+
+    def sample(self, rtt: float, inflight: int) -> None:
+        if self._long_rtt is None:
+            self._long_rtt = self._short_rtt = rtt
+            return
+        self._short_rtt += (rtt - self._short_rtt) / self._short_window
+        self._long_rtt += (rtt - self._long_rtt) / self._long_window
+        # latency fell well below the baseline: let the baseline follow fast
+        if self._long_rtt > 2 * self._short_rtt:
+            self._long_rtt *= 0.95
+        if inflight < self.limit / 2:
+            return
+        gradient = max(
+            0.5, min(1.0, self._tolerance * self._long_rtt / self._short_rtt)
+        )
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - self._smoothing) + target * self._smoothing
+        self.limit = min(self._max, max(self._min, limit))
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 1),
+            "long_rtt_ms": round((self._long_rtt or 0.0) * 1000, 3),
+            "short_rtt_ms": round(self._short_rtt * 1000, 3),
+        }
+
+
+class ConcurrencyLimitInterceptor(ServerInterceptor):
+    """Admission control for CatalogService RPCs.
+
+    An RPC is rejected with RESOURCE_EXHAUSTED when the in-flight count
+    has reached its priority's share of the adaptive limit, and with
+    DEADLINE_EXCEEDED when its remaining deadline is shorter than the
+    method's recent service time (it would time out anyway). While
+    rejecting, ``on_overload(True)`` is called; ``on_overload(False)``
+    follows once ``cooldown`` seconds pass without a rejection.
+
+    Streaming RPCs take a low-priority slot but give no latency samples.
+    Health and reflection RPCs are never limited.
+    """
+
+    def __init__(
+        self,
+        limit: GradientLimit,
+        low_priority_share: float = 0.7,
+        on_overload: Optional[Callable[[bool], Awaitable[None]]] = None,
+        cooldown: float = 5.0,
+    ) -> None:
+        self._limit = limit
+        self._low_priority_share = low_priority_share
+        self._on_overload = on_overload
+        self._cooldown = cooldown
+        self._inflight = 0
+        # method -> [EWMA service time in seconds, samples]
+        self._service_time: dict[str, list] = {}
+        self._overloaded = False
+        self._last_rejection = 0.0
+        self._rejected = 0
+        self._deadline_dropped = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        full_method = handler_call_details.method
+        if handler is None or not full_method.startswith(SERVICE_PREFIX):
+            return handler
+        method = full_method[len(SERVICE_PREFIX) :]
+        if handler.unary_unary:
+            return grpc.unary_unary_rpc_method_handler(
+                self._wrap_unary(method, handler.unary_unary),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        if handler.unary_stream:
+            return grpc.unary_stream_rpc_method_handler(
+                self._wrap_stream(method, handler.unary_stream),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        return handler
+
+    def _wrap_unary(self, method: str, behavior):
+        async def wrapper(request, context):
+            await self._admit(method, context)
+            inflight = self._inflight
+            start = time.perf_counter()
+            try:
+                response = await behavior(request, context)
+            finally:
+                self._inflight -= 1
+            self._sample(method, time.perf_counter() - start, inflight)
+            return response
+
+        return wrapper
+
+    def _wrap_stream(self, method: str, behavior):
+        async def wrapper(request, context):
+            await self._admit(method, context)
+            try:
+                async for response in behavior(request, context):
+                    yield response
+            finally:
+                self._inflight -= 1
+
+        return wrapper
+
+    async def _admit(self, method: str, context) -> None:
+        allowed = self._limit.limit
+        if method not in HIGH_PRIORITY:
+            allowed *= self._low_priority_share
+        if self._inflight >= allowed:
+            self._rejected += 1
+            self._overload()
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "server overloaded")
+        remaining = context.time_remaining()
+        expected = self._service_time.get(method)
+        if (
+            remaining is not None
+            and expected is not None
+            and expected[1] >= _MIN_SAMPLES
+            and remaining < expected[0]
+        ):
+            self._deadline_dropped += 1
+            expected[0] *= _DROP_DECAY
+            await context.abort(
+                grpc.StatusCode.DEADLINE_EXCEEDED,
+                "deadline shorter than expected service time",
+            )
+        self._inflight += 1
+
+    def _sample(self, method: str, seconds: float, inflight: int) -> None:
+        # successful calls only: a failure's latency says little about load
+        self._limit.sample(seconds, inflight)
+        expected = self._service_time.get(method)
+        if expected is None:
+            self._service_time[method] = [seconds, 1]
+        else:
+            expected[0] += (seconds - expected[0]) * 0.1
+            expected[1] += 1
+
+    def _overload(self) -> None:
+        self._last_rejection = time.monotonic()
+        if not self._overloaded:
+            self._overloaded = True
+            stats = self._limit.stats()
+            logger.warning(
+                "shedding load: limit=%s inflight=%s short_rtt=%sms long_rtt=%sms",
+                stats["limit"],
+                self._inflight,
+                stats["short_rtt_ms"],
+                stats["long_rtt_ms"],
+                extra=stats,
+            )
+            self._notify(True)
+            asyncio.get_running_loop().call_later(self._cooldown, self._maybe_recover)
+
+    def _maybe_recover(self) -> None:
+        quiet_for = time.monotonic() - self._last_rejection
+        if quiet_for < self._cooldown:
+            asyncio.get_running_loop().call_later(
+                self._cooldown - quiet_for, self._maybe_recover
+            )
+            return
+        self._overloaded = False
+        logger.info(
+            "load shedding stopped, %s rejected so far",
+            self._rejected,
+            extra={"rejected": self._rejected},
+        )
+        self._notify(False)
+
+    def _notify(self, overloaded: bool) -> None:
+        if self._on_overload is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._on_overload(overloaded))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> dict:
+        return {
+            **self._limit.stats(),
+            "inflight": self._inflight,
+            "overloaded": self._overloaded,
+            "rejected": self._rejected,
+            "deadline_dropped": self._deadline_dropped,
+            "service_time_ms": {
+                method: round(ewma * 1000, 3)
+                for method, (ewma, _) in sorted(self._service_time.items())
+            },
+        }
+
+
+concurrency_limit = ConcurrencyLimitInterceptor(
+    GradientLimit(
+        initial=settings.concurrency_limit_initial,
+        min_limit=settings.concurrency_limit_min,
+        max_limit=settings.concurrency_limit_max,
+        tolerance=settings.concurrency_limit_tolerance,
+    ),
+    low_priority_share=settings.concurrency_low_priority_share,
+    on_overload=readiness.set_overloaded,
+    cooldown=settings.concurrency_overload_cooldown_seconds,
+)
@@ -1,54 +1,196 @@
-import asyncio, grpc
+import asyncio, grpc, logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
 from ..db import AsyncSessionLocal, engine
-from ..infrastructure.repositories import SqlProductRepository, CachedProductRepository
-from ..services.search_strategies import SearchStrategyFactory
-from ..domain.models import Product
+from ..infrastructure.asyncpg_repository import (
+    AsyncpgProductRepository,
+    create_read_pool,
+)
+from ..infrastructure.loader import BatchLoader
+from ..infrastructure.repositories import (
+    SqlProductRepository,
+    CachedProductRepository,
+    LoadingProductRepository,
+    search_results,
+    warm_product_cache,
+)
+from ..services.embeddings import QueryEmbedder
+from ..services.pagination import (
+    InvalidPageToken,
+    decode_page_token,
+    encode_page_token,
+)
+from ..services.search_strategies import (
+    SearchStrategyFactory,
+    check_pgvector_version,
+)
+from ..domain.repositories import ProductRepository
+from ..domain.events import domain_events
+from ..domain.hotkeys import hot_products
+from ..domain.models import ProductView
+from ..timing import stage
+from ..supervisor import is_first_worker, worker_count
+from ..warmup import readiness, save_hot_ids_snapshot, warm_up
 from .. import product_pb2, product_pb2_grpc
+from grpc_health.v1 import health_pb2_grpc
 
-from .logging_interceptor import LoggingInterceptor
+from .concurrency_interceptor import concurrency_limit
+from .telemetry_interceptor import TelemetryInterceptor
 
+logger = logging.getLogger("catalog.grpc")
 
-# Placeholder embedding fn (fast no-op). Replace with real async embedder.
-async def embed_query(query: str) -> list[float]:
-    return [0.0] * 1536
+
+# Placeholder batch embedding fn (fast no-op). Replace with real async embedder.
+async def embed_queries(queries: list[str]) -> list[list[float]]:
+    return [[0.0] * 1536 for _ in queries]
+
+
+# Shared by all SearchProducts calls: cached per normalized query, batched misses
+embed_query = QueryEmbedder(
+    embed_queries,
+    window_seconds=settings.embedding_batch_window_ms / 1000,
+    max_batch=settings.embedding_max_batch,
+)
+
+
+def default_search_factory(session: AsyncSession) -> SearchStrategyFactory:
+    return SearchStrategyFactory(
+        session, embed_query, session_factory=AsyncSessionLocal
+    )
 
 
 class CatalogService(product_pb2_grpc.CatalogServiceServicer):
-    def __init__(self) -> None:
-        pass
+    def __init__(
+        self,
+        read_repo: Optional[ProductRepository] = None,
+        search_factory: Callable[[AsyncSession], Any] = default_search_factory,
+    ) -> None:
+        # read_repo: optional session-less repository for the hot reads
+        # (asyncpg fast path); falls back to the ORM repository per batch
+        self._read_repo = read_repo
+        # per-RPC strategy factory (an in-memory one for benchmarks)
+        self._search_factory = search_factory
+        self._loader: BatchLoader[str, ProductView] = BatchLoader(
+            self._fetch_products,
+            window_seconds=settings.loader_window_ms / 1000,
+            max_batch=settings.loader_max_batch,
+        )
+
+    async def _fetch_products(self, ids: list[str]) -> dict[str, ProductView]:
+        # batch_fn of the product loader, called once per merged batch
+        if self._read_repo is not None:
+            products = await self._read_repo.batch_get(ids)
+        else:
+            async with AsyncSessionLocal() as session:
+                products = await SqlProductRepository(session).batch_get(ids)
+        return {p.id: p for p in products}
 
-    async def _get_repo(self) -> CachedProductRepository:
-        session: AsyncSession = AsyncSessionLocal()
-        base_repo = SqlProductRepository(session)
-        return CachedProductRepository(base_repo)
+    def _build_repo(self, session: AsyncSession) -> CachedProductRepository:
+        # get/batch_get are served by the shared loader and its own sessions
+        return CachedProductRepository(
+            LoadingProductRepository(self._loader, SqlProductRepository(session))
+        )
+
+    @asynccontextmanager
+    async def _repo(self) -> AsyncIterator[CachedProductRepository]:
+        # one session per RPC, closed (connection returned) on every exit path
+        async with AsyncSessionLocal() as session:
+            yield self._build_repo(session)
 
     async def GetProduct(self, request, context):
-        repo = await self._get_repo()
-        product = await repo.get(request.id)
+        async with self._repo() as repo:
+            product = await repo.get(request.id)
         if not product:
             await context.abort(grpc.StatusCode.NOT_FOUND, "Product not found")
-        return self._to_message(product)
+        with stage("proto"):
+            return self._to_message(product)
 
     async def BatchGetProducts(self, request, context):
-        repo = await self._get_repo()
-        products = await repo.batch_get(list(request.ids))
-        return product_pb2.BatchGetProductsResponse(
-            products=[self._to_message(p) for p in products]
-        )
+        async with self._repo() as repo:
+            products = await repo.batch_get(list(request.ids))
+        with stage("proto"):
+            return product_pb2.BatchGetProductsResponse(
+                products=[self._to_message(p) for p in products]
+            )
 
     async def SearchProducts(self, request, context):
+        limit = request.limit or 20
+        ef_search = request.ef_search or settings.vector_ef_search
+        probes = request.probes or settings.vector_probes
         async with AsyncSessionLocal() as session:
-            factory = SearchStrategyFactory(session, embed_query)
-            strategy = factory.create(request.query)
-            products = await strategy.search(
-                session, request.query, request.limit or 20
+            factory = self._search_factory(session)
+            strategy = factory.create(request.query, ef_search=ef_search, probes=probes)
+            strategy_name = type(strategy).__name__
+            cursor = None
+            if request.page_token:
+                try:
+                    cursor = decode_page_token(
+                        request.page_token,
+                        strategy_name,
+                        request.query,
+                        strategy.valid_cursor,
+                    )
+                except InvalidPageToken as e:
+                    await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+            async def run():
+                return await strategy.search_page(session, request.query, limit, cursor)
+
+            if cursor is None:
+                key = search_results.key(
+                    strategy_name, request.query, limit, ef_search, probes
+                )
+                page = await self._build_repo(session).cached_search(
+                    key, run, should_cache=lambda: not strategy.degraded
+                )
+            else:
+                page = await run()
+        next_page_token = ""
+        if page.next_cursor is not None:
+            next_page_token = encode_page_token(
+                strategy_name, request.query, page.next_cursor
             )
-        return product_pb2.SearchProductsResponse(
-            products=[self._to_message(p) for p in products]
-        )
+        with stage("proto"):
+            return product_pb2.SearchProductsResponse(
+                products=[self._to_message(p) for p in page.products],
+                next_page_token=next_page_token,
+            )
+
+    async def StreamBatchGetProducts(self, request, context):
+        # export path: reads the cursor directly, bypassing the product cache
+        async with AsyncSessionLocal() as session:
+            repo = SqlProductRepository(session)
+            async for products in repo.stream_batch_get(
+                list(request.ids), settings.stream_chunk_size
+            ):
+                with stage("proto"):
+                    response = product_pb2.BatchGetProductsResponse(
+                        products=[self._to_message(p) for p in products]
+                    )
+                yield response
+
+    async def StreamSearchProducts(self, request, context):
+        limit = min(request.limit or 20, settings.stream_search_max_limit)
+        async with AsyncSessionLocal() as session:
+            factory = self._search_factory(session)
+            strategy = factory.create(
+                request.query,
+                ef_search=request.ef_search or settings.vector_ef_search,
+                probes=request.probes or settings.vector_probes,
+                streaming=True,
+            )
+            async for products in strategy.stream(
+                session, request.query, limit, settings.stream_chunk_size
+            ):
+                with stage("proto"):
+                    response = product_pb2.SearchProductsResponse(
+                        products=[self._to_message(p) for p in products]
+                    )
+                yield response
 
-    def _to_message(self, p: Product) -> product_pb2.Product:
+    def _to_message(self, p: ProductView) -> product_pb2.Product:
         return product_pb2.Product(
             id=p.id,
             title=p.title,
@@ -59,20 +201,106 @@ class CatalogService(product_pb2_grpc.CatalogServiceServicer):
         )
 
 
-async def serve() -> None:
+async def warm_hot_products(service: CatalogService) -> None:
+    # keeps the hottest ids cached across TTL expiry and eviction
+    while True:
+        await asyncio.sleep(settings.hotkeys_warm_interval_seconds)
+        ids = [pid for pid, _ in hot_products.top(settings.hotkeys_warm_count)]
+        try:
+            await warm_product_cache(ids, service._fetch_products)
+        except Exception as e:
+            logger.warning("cache warming failed: %r", e, extra={"error": repr(e)})
+
+
+async def check_database() -> None:
+    # a too-old pgvector fails startup; an unreachable DB only warns, as
+    # warm-up and readiness already cover a database that comes up later
+    try:
+        async with AsyncSessionLocal() as session:
+            version = await check_pgvector_version(session)
+    except RuntimeError:
+        raise
+    except Exception as e:
+        logger.warning("pgvector version check failed: %r", e)
+        return
+    logger.info("pgvector %s", version)
+
+
+async def serve(stop: Optional[asyncio.Event] = None) -> None:
+    """Serve until terminated or, when given, until ``stop`` is set.
+
+    On ``stop`` the health service goes NOT_SERVING, new RPCs are refused and
+    in-flight ones get ``shutdown_grace_seconds`` to finish.
+    """
+    interceptors = [
+        TelemetryInterceptor(
+            log_sample_rate=settings.telemetry_log_sample_rate,
+            slow_request_seconds=settings.slow_request_ms / 1000,
+        )
+    ]
+    if settings.concurrency_limit_enabled:
+        # inside telemetry, so shed requests still show up in the metrics
+        interceptors.append(concurrency_limit)
     server = grpc.aio.server(
-        interceptors=[LoggingInterceptor()],
+        interceptors=interceptors,
         options=[
             ("grpc.keepalive_time_ms", 20000),
             ("grpc.keepalive_timeout_ms", 20000),
             ("grpc.http2.max_pings_without_data", 0),
             ("grpc.max_concurrent_streams", 1000),
+            # supervisor workers (app.supervisor) all bind the same port
+            ("grpc.so_reuseport", int(worker_count() > 1)),
         ],
     )
-    product_pb2_grpc.add_CatalogServiceServicer_to_server(CatalogService(), server)
-    server.add_insecure_port("[::]:50051")  # Istio handles mTLS
+    await check_database()
+    read_pool = await create_read_pool() if settings.fast_read_path else None
+    read_repo = AsyncpgProductRepository(read_pool) if read_pool else None
+    service = CatalogService(read_repo)
+    product_pb2_grpc.add_CatalogServiceServicer_to_server(service, server)
+    # NOT_SERVING until warm-up is done
+    health_pb2_grpc.add_HealthServicer_to_server(readiness.health, server)
+    await readiness.mark_not_serving()
+    server.add_insecure_port(f"[::]:{settings.grpc_port}")  # Istio handles mTLS
+    await domain_events.start()
+    warmer = None
+    # other workers' readiness changes the pod-wide health entry
+    pod_follower = (
+        asyncio.create_task(readiness.follow_pod()) if worker_count() > 1 else None
+    )
     await server.start()
-    await server.wait_for_termination()
+    try:
+        try:
+            await asyncio.wait_for(
+                warm_up(service._fetch_products), settings.warmup_timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            logger.warning("warm-up timed out, serving anyway")
+        await readiness.mark_serving()
+        if settings.hotkeys_warm_interval_seconds > 0:
+            warmer = asyncio.create_task(warm_hot_products(service))
+        if stop is None:
+            await server.wait_for_termination()
+        else:
+            await stop.wait()
+            await readiness.mark_not_serving()
+            await server.stop(settings.shutdown_grace_seconds)
+    finally:
+        await readiness.mark_not_serving()
+        if warmer is not None:
+            warmer.cancel()
+        if pod_follower is not None:
+            pod_follower.cancel()
+        await domain_events.stop()
+        # one writer per pod; a failed snapshot must not skip the pool close
+        if settings.warmup_snapshot_path and is_first_worker():
+            try:
+                save_hot_ids_snapshot(
+                    settings.warmup_snapshot_path, settings.warmup_preload_count
+                )
+            except Exception as e:
+                logger.warning("saving hot-ids snapshot failed: %r", e)
+        if read_pool is not None:
+            await read_pool.close()
 
 
 if __name__ == "__main__":
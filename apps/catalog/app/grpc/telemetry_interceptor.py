@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import random
+import time
+import grpc
+from grpc.aio import ServerInterceptor
+from ..telemetry import RpcMetrics, rpc_metrics
+from ..timing import TIMING_METADATA_KEY, StageTimings, start_timings
+
+logger = logging.getLogger("catalog.grpc")
+
+# answered as designed: logged at the sample rate like successes
+_EXPECTED = (
+    grpc.StatusCode.OK,
+    grpc.StatusCode.NOT_FOUND,
+    grpc.StatusCode.INVALID_ARGUMENT,
+    # the BFF cancels its losing hedge attempts on purpose
+    grpc.StatusCode.CANCELLED,
+)
+
+
+def _status(context, error: BaseException) -> grpc.StatusCode:
+    if isinstance(error, asyncio.CancelledError):
+        return grpc.StatusCode.CANCELLED
+    # context.abort() sets the code before raising
+    return context.code() or grpc.StatusCode.UNKNOWN
+
+
+def _send_timings(context, timings: StageTimings) -> None:
+    # trailing metadata goes out with the status, after the last response
+    if timings.stages:
+        context.set_trailing_metadata(((TIMING_METADATA_KEY, timings.header()),))
+
+
+class TelemetryInterceptor(ServerInterceptor):
+    """Records latency and status of every RPC; logs only a sample of them.
+
+    Successful calls (and expected errors such as NOT_FOUND) are logged with
+    probability ``log_sample_rate``, other failures always; records go
+    through the queue-backed root handler.
+
+    Each RPC also collects per-stage timings (see ``app.timing``): they are
+    returned to the caller in the ``catalog-timing`` trailing metadata and
+    logged in full for calls slower than ``slow_request_seconds``.
+    """
+
+    def __init__(
+        self,
+        metrics: RpcMetrics = rpc_metrics,
+        log_sample_rate: float = 0.01,
+        slow_request_seconds: float = 0.25,
+    ) -> None:
+        self._metrics = metrics
+        self._log_sample_rate = log_sample_rate
+        self._slow_request_seconds = slow_request_seconds
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        # e.g. /catalog.v1.CatalogService/GetProduct -> GetProduct
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        if handler.unary_unary:
+            return grpc.unary_unary_rpc_method_handler(
+                self._wrap_unary(method, handler.unary_unary),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        if handler.unary_stream:
+            return grpc.unary_stream_rpc_method_handler(
+                self._wrap_stream(method, handler.unary_stream),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        return handler
+
+    def _wrap_unary(self, method: str, behavior):
+        async def wrapper(request, context):
+            start = time.perf_counter()
+            timings = start_timings()
+            code = grpc.StatusCode.OK
+            try:
+                response = await behavior(request, context)
+                _send_timings(context, timings)
+                return response
+            except BaseException as e:
+                code = _status(context, e)
+                raise
+            finally:
+                self._record(method, code, time.perf_counter() - start, timings)
+
+        return wrapper
+
+    def _wrap_stream(self, method: str, behavior):
+        async def wrapper(request, context):
+            start = time.perf_counter()
+            timings = start_timings()
+            code = grpc.StatusCode.OK
+            try:
+                async for response in behavior(request, context):
+                    yield response
+                _send_timings(context, timings)
+            except BaseException as e:
+                code = _status(context, e)
+                raise
+            finally:
+                self._record(method, code, time.perf_counter() - start, timings)
+
+        return wrapper
+
+    def _record(
+        self,
+        method: str,
+        code: grpc.StatusCode,
+        seconds: float,
+        timings: StageTimings,
+    ) -> None:
+        self._metrics.observe(method, code.name, seconds)
+        if seconds >= self._slow_request_seconds:
+            # the installed formatter prints the message only, not extras
+            logger.warning(
+                "slow gRPC request %s code=%s total=%.1fms stages: %s",
+                method,
+                code.name,
+                seconds * 1000,
+                timings.header(),
+                extra={
+                    "method": method,
+                    "code": code.name,
+                    "seconds": seconds,
+                    "stages_ms": timings.as_millis(),
+                },
+            )
+        elif code not in _EXPECTED:
+            logger.warning(
+                "gRPC request failed %s code=%s %.1fms",
+                method,
+                code.name,
+                seconds * 1000,
+                extra={"method": method, "code": code.name, "seconds": seconds},
+            )
+        elif random.random() < self._log_sample_rate:
+            logger.info(
+                "gRPC request %s code=%s %.1fms",
+                method,
+                code.name,
+                seconds * 1000,
+                extra={"method": method, "code": code.name, "seconds": seconds},
+            )
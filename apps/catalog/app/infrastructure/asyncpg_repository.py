@@ -0,0 +1,89 @@
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Sequence
+import asyncpg
+from ..config import settings
+from ..domain.events import domain_events
+from ..domain.models import ProductView
+from ..domain.repositories import ProductRepository
+from ..timing import record, stage
+
+# Constant SQL text: asyncpg's per-connection statement cache keys on it, so each
+# statement is parsed and planned once per connection and then reused.
+_COLUMNS = "id, title, description, price, currency, image_url"
+GET_SQL = f"SELECT {_COLUMNS} FROM products WHERE id = $1"
+# one text[] parameter instead of IN ($1, ..., $n): one plan for every batch size
+BATCH_GET_SQL = f"SELECT {_COLUMNS} FROM products WHERE id = ANY($1::text[])"
+SEARCH_SQL = f"SELECT {_COLUMNS} FROM products WHERE title ILIKE $1 LIMIT $2"
+
+
+class AsyncpgProductRepository(ProductRepository):
+    """Hot-path ProductRepository on a raw asyncpg pool.
+
+    Skips SQLAlchemy statement compilation, the identity map and ORM hydration;
+    rows go straight into ProductView.
+    """
+
+    def __init__(self, pool: asyncpg.Pool) -> None:
+        self._pool = pool
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[asyncpg.Connection]:
+        # explicit acquire (instead of pool.fetch) so the wait is its own stage
+        start = time.perf_counter()
+        async with self._pool.acquire() as conn:
+            record("pool", time.perf_counter() - start)
+            yield conn
+
+    async def get(self, product_id: str) -> Optional[ProductView]:
+        async with self._connection() as conn:
+            with stage("sql"):
+                row = await conn.fetchrow(GET_SQL, product_id)
+        if row is None:
+            return None
+        with stage("hydrate"):
+            product = ProductView(*row)
+        domain_events.publish("product_read", product.id)
+        return product
+
+    async def batch_get(self, ids: list[str]) -> Sequence[ProductView]:
+        if not ids:
+            return []
+        async with self._connection() as conn:
+            with stage("sql"):
+                rows = await conn.fetch(BATCH_GET_SQL, ids)
+        with stage("hydrate"):
+            products = [ProductView(*row) for row in rows]
+        domain_events.publish_many("product_read", [p.id for p in products])
+        return products
+
+    async def search(self, query: str, limit: int = 20) -> Sequence[ProductView]:
+        async with self._connection() as conn:
+            with stage("sql"):
+                rows = await conn.fetch(SEARCH_SQL, f"%{query}%", limit)
+        with stage("hydrate"):
+            products = [ProductView(*row) for row in rows]
+        domain_events.publish_many("product_read", [p.id for p in products])
+        return products
+
+
+async def _prepare_hot_statements(conn: asyncpg.Connection) -> None:
+    # run each hot statement once with a no-match argument so it is prepared
+    # and cached before the connection serves real traffic
+    await conn.fetchrow(GET_SQL, "")
+    await conn.fetch(BATCH_GET_SQL, [])
+    await conn.fetch(SEARCH_SQL, "", 0)
+
+
+def asyncpg_dsn() -> str:
+    # CATALOG_DB_URL is a SQLAlchemy URL (postgresql+asyncpg://...)
+    return str(settings.db_url).replace("+asyncpg", "", 1)
+
+
+async def create_read_pool() -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        asyncpg_dsn(),
+        min_size=settings.fast_read_pool_min_size,
+        max_size=settings.fast_read_pool_max_size,
+        init=_prepare_hot_statements,
+    )
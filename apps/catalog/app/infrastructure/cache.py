@@ -0,0 +1,117 @@
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+def normalize_query(query: str) -> str:
+    # cache-key form of a search query: "  iPhone   15 " -> "iphone 15"
+    return " ".join(query.lower().split())
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    rejections: int = 0
+
+
+class LruCache(Generic[V]):
+    """Bounded in-process LRU cache with per-entry TTL and a memory budget.
+
+    Meant to be shared by all coroutines of one event loop (no locking).
+    Entry sizes come from ``sizeof`` and are an estimate, not exact RSS.
+    Once full, new keys must pass ``admit`` (if given) to evict older ones.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        max_bytes: int,
+        sizeof: Callable[[V], int] = sys.getsizeof,
+        clock: Callable[[], float] = time.monotonic,
+        admit: Optional[Callable[[Hashable], bool]] = None,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._clock = clock
+        self._admit = admit
+        # key -> (value, expires_at, size); order = recency, oldest first
+        self._entries: OrderedDict[Hashable, tuple[V, float, int]] = OrderedDict()
+        self._bytes = 0
+        self._stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        # no recency update, no stats
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > self._clock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self._stats.expirations += 1
+            self._stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V, ttl_seconds: Optional[float] = None) -> None:
+        size = self._sizeof(value)
+        if size > self._max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        elif self._admit is not None and self._full(size) and not self._admit(key):
+            self._stats.rejections += 1
+            return
+        ttl = self._ttl if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (value, self._clock() + ttl, size)
+        self._bytes += size
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._stats.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self._stats.hits + self._stats.misses
+        return {
+            **asdict(self._stats),
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hit_ratio": self._stats.hits / lookups if lookups else 0.0,
+        }
+
+    def _full(self, incoming_size: int) -> bool:
+        return (
+            len(self._entries) >= self._max_entries
+            or self._bytes + incoming_size > self._max_bytes
+        )
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
@@ -0,0 +1,111 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, Mapping, Optional, TypeVar
+from ..timing import StageTimings, current_timings, start_timings
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchFn = Callable[[list[K]], Awaitable[Mapping[K, V]]]
+
+
+class BatchLoader(Generic[K, V]):
+    """DataLoader-style single-flight and micro-batching front for a batch fetch.
+
+    Concurrent loads of the same key share one in-flight future, and keys
+    requested within ``window_seconds`` of each other are fetched with a single
+    ``batch_fn`` call (at most ``max_batch`` keys per call). Keys missing from
+    the mapping returned by ``batch_fn`` resolve to ``None``.
+
+    The stages timed inside a batch (pool, sql, ...) are added to the stage
+    timings of every request whose keys started that batch.
+    """
+
+    def __init__(
+        self, batch_fn: BatchFn, window_seconds: float = 0.002, max_batch: int = 100
+    ) -> None:
+        self._batch_fn = batch_fn
+        self._window = window_seconds
+        self._max_batch = max_batch
+        self._inflight: dict[K, asyncio.Future] = {}
+        self._pending: list[K] = []
+        # stage timings of the requests waiting on the pending batch
+        self._pending_timings: dict[int, StageTimings] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._loads = 0
+        self._coalesced = 0
+        self._batches = 0
+
+    async def load(self, key: K) -> Optional[V]:
+        # shield: a cancelled caller must not cancel the future others share
+        return await asyncio.shield(self._future(key))
+
+    async def load_many(self, keys: list[K]) -> list[Optional[V]]:
+        futures = [self._future(k) for k in keys]
+        return list(await asyncio.shield(asyncio.gather(*futures)))
+
+    def stats(self) -> dict:
+        return {
+            "loads": self._loads,
+            "coalesced": self._coalesced,
+            "batches": self._batches,
+            "inflight": len(self._inflight),
+        }
+
+    def _future(self, key: K) -> asyncio.Future:
+        self._loads += 1
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self._coalesced += 1
+            return fut
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._inflight[key] = fut
+        self._pending.append(key)
+        timings = current_timings()
+        if timings is not None:
+            self._pending_timings[id(timings)] = timings
+        if len(self._pending) >= self._max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._dispatch)
+        return fut
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        keys, self._pending = self._pending, []
+        waiting, self._pending_timings = self._pending_timings, {}
+        if not keys:
+            return
+        self._batches += 1
+        task = asyncio.get_running_loop().create_task(
+            self._run(keys, list(waiting.values()))
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, keys: list[K], waiting: list[StageTimings]) -> None:
+        # the task runs in a copy of the dispatching request's context: time
+        # the batch on its own and hand the result to every waiting request
+        batch = start_timings()
+        try:
+            found = await self._batch_fn(keys)
+        except asyncio.CancelledError:
+            for key in keys:
+                self._inflight.pop(key).cancel()
+            raise
+        except Exception as e:
+            for key in keys:
+                fut = self._inflight.pop(key)
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            for timings in waiting:
+                timings.merge(batch)
+        for key in keys:
+            fut = self._inflight.pop(key)
+            if not fut.done():
+                fut.set_result(found.get(key))
@@ -0,0 +1,125 @@
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Any, Iterable, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..domain.events import domain_events
+from ..domain.models import ProductView, SearchPage
+from ..domain.repositories import ProductRepository
+from ..services.search_strategies import SearchStrategy
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _tokens(text: Optional[str]) -> set[str]:
+    return set(_TOKEN.findall(text.lower())) if text else set()
+
+
+class InMemoryProductRepository(ProductRepository):
+    """ProductRepository over a dict, for benchmarks and runs without Postgres.
+
+    Search goes through an inverted index of title/description tokens: a
+    product matches when it has every query token. Results come in id order
+    and page on the last id, like KeywordSearchStrategy.
+    """
+
+    def __init__(self, products: Iterable[ProductView] = ()) -> None:
+        self._products: dict[str, ProductView] = {}
+        # token -> sorted product ids
+        self._index: defaultdict[str, list[str]] = defaultdict(list)
+        for p in products:
+            self._products[p.id] = p
+            for token in _tokens(p.title) | _tokens(p.description):
+                self._index[token].append(p.id)
+        for ids in self._index.values():
+            ids.sort()
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    async def get(self, product_id: str) -> Optional[ProductView]:
+        product = self._products.get(product_id)
+        if product is not None:
+            domain_events.publish("product_read", product.id)
+        return product
+
+    async def batch_get(self, ids: list[str]) -> Sequence[ProductView]:
+        products = [p for p in map(self._products.get, ids) if p is not None]
+        domain_events.publish_many("product_read", [p.id for p in products])
+        return products
+
+    async def search(self, query: str, limit: int = 20) -> Sequence[ProductView]:
+        return (await self.search_page(query, limit)).products
+
+    async def search_page(
+        self, query: str, limit: int, cursor: Optional[str] = None
+    ) -> SearchPage:
+        tokens = _tokens(query)
+        if not tokens:
+            return SearchPage([])
+        # walk the shortest posting list, check the other tokens per candidate
+        candidates = min((self._index.get(t, []) for t in tokens), key=len)
+        start = bisect_right(candidates, cursor) if cursor is not None else 0
+        products: list[ProductView] = []
+        for i in range(start, len(candidates)):
+            p = self._products[candidates[i]]
+            if len(tokens) > 1 and not tokens <= (
+                _tokens(p.title) | _tokens(p.description)
+            ):
+                continue
+            products.append(p)
+            if len(products) == limit:
+                break
+        domain_events.publish_many("product_read", [p.id for p in products])
+        ids = [p.id for p in products]
+        next_cursor = ids[-1] if len(ids) == limit else None
+        return SearchPage(products, next_cursor, ids)
+
+    def matching(self, query: str, ids: Sequence[str]) -> set[str]:
+        """The ``ids`` that match ``query``."""
+        tokens = _tokens(query)
+        found = set()
+        for pid in ids:
+            p = self._products.get(pid)
+            if (
+                p is not None
+                and tokens
+                and tokens <= (_tokens(p.title) | _tokens(p.description))
+            ):
+                found.add(pid)
+        return found
+
+
+class InMemorySearchStrategy(SearchStrategy):
+    def __init__(self, repo: InMemoryProductRepository) -> None:
+        self._repo = repo
+
+    async def search_page(
+        self, session: AsyncSession, query: str, limit: int, cursor: Any = None
+    ) -> SearchPage:
+        # session unused: the catalog lives in memory
+        return await self._repo.search_page(query, limit, cursor)
+
+    def valid_cursor(self, cursor: Any) -> bool:
+        return isinstance(cursor, str)
+
+    async def ranked_before(
+        self, session: AsyncSession, query: str, ids: Sequence[str], cursor: Any
+    ) -> set[str]:
+        # id order: everything matching up to the cursor id
+        if cursor is None:
+            return set()
+        before = [pid for pid in ids if cursor is False or pid <= cursor]
+        return self._repo.matching(query, before)
+
+
+class InMemorySearchStrategyFactory:
+    """Stands in for SearchStrategyFactory: every query searches ``repo``."""
+
+    def __init__(self, repo: InMemoryProductRepository) -> None:
+        self._repo = repo
+
+    def create(
+        self, query: str, ef_search: int = 0, probes: int = 0, streaming: bool = False
+    ) -> SearchStrategy:
+        return InMemorySearchStrategy(self._repo)
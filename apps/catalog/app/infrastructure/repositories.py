@@ -1,72 +1,305 @@
-from typing import Sequence, Optional
-from sqlalchemy import select, text
+import sys
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Mapping,
+    Sequence,
+    Optional,
+)
+from sqlalchemy import String, any_, bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..domain.models import Product
+from ..config import settings
+from ..domain.models import Product, ProductView, SearchPage
 from ..domain.repositories import ProductRepository
 from ..domain.events import domain_events
+from ..domain.hotkeys import hot_products
+from ..timing import stage
+from .cache import LruCache, normalize_query
+from .loader import BatchLoader
+
+
+# Columns the read paths serialize, in ProductView field order
+PRODUCT_VIEW_COLUMNS = (
+    Product.id,
+    Product.title,
+    Product.description,
+    Product.price,
+    Product.currency,
+    Product.image_url,
+)
 
 
 class SqlProductRepository(ProductRepository):
     def __init__(self, session: AsyncSession) -> None:
         self._session = session
 
-    async def get(self, product_id: str) -> Optional[Product]:
-        stmt = select(Product).where(Product.id == product_id)
-        res = await self._session.execute(stmt)
-        product = res.scalar_one_or_none()
-        if product:
-            domain_events.publish("product_read", {"id": product.id})
+    async def get(self, product_id: str) -> Optional[ProductView]:
+        stmt = select(*PRODUCT_VIEW_COLUMNS).where(Product.id == product_id)
+        with stage("sql"):
+            res = await self._session.execute(stmt)
+        row = res.one_or_none()
+        if row is None:
+            return None
+        with stage("hydrate"):
+            product = ProductView(*row)
+        domain_events.publish("product_read", product.id)
         return product
 
-    async def batch_get(self, ids: list[str]) -> Sequence[Product]:
+    async def batch_get(self, ids: list[str]) -> Sequence[ProductView]:
         if not ids:
             return []
-        stmt = select(Product).where(Product.id.in_(ids))
-        res = await self._session.execute(stmt)
-        products = res.scalars().all()
-        for p in products:
-            domain_events.publish("product_read", {"id": p.id})
+        stmt = select(*PRODUCT_VIEW_COLUMNS).where(Product.id.in_(ids))
+        with stage("sql"):
+            res = await self._session.execute(stmt)
+        with stage("hydrate"):
+            products = [ProductView(*row) for row in res]
+        domain_events.publish_many("product_read", [p.id for p in products])
         return products
 
-    async def search(self, query: str, limit: int = 20) -> Sequence[Product]:
+    async def stream_batch_get(
+        self, ids: list[str], chunk_size: int
+    ) -> AsyncIterator[list[ProductView]]:
+        """Yield products in ``chunk_size`` chunks off a server-side cursor."""
+        if not ids:
+            return
+        # one text[] bind instead of an IN list: large exports stay one parameter
+        ids_param = bindparam("ids", ids, type_=ARRAY(String))
+        stmt = (
+            select(*PRODUCT_VIEW_COLUMNS)
+            .where(Product.id == any_(ids_param))
+            .execution_options(yield_per=chunk_size)
+        )
+        with stage("sql"):
+            res = await self._session.stream(stmt)
+        async for rows in res.partitions():
+            with stage("hydrate"):
+                products = [ProductView(*row) for row in rows]
+            domain_events.publish_many("product_read", [p.id for p in products])
+            yield products
+
+    async def search(self, query: str, limit: int = 20) -> Sequence[ProductView]:
         # Simple ILIKE search; hybrid/vector added via strategy factory (below)
-        stmt = select(Product).where(Product.title.ilike(f"%{query}%")).limit(limit)
-        res = await self._session.execute(stmt)
-        products = res.scalars().all()
-        for p in products:
-            domain_events.publish("product_read", {"id": p.id})
+        stmt = (
+            select(*PRODUCT_VIEW_COLUMNS)
+            .where(Product.title.ilike(f"%{query}%"))
+            .limit(limit)
+        )
+        with stage("sql"):
+            res = await self._session.execute(stmt)
+        with stage("hydrate"):
+            products = [ProductView(*row) for row in res]
+        domain_events.publish_many("product_read", [p.id for p in products])
         return products
 
 
-# Decorator pattern – e.g. simple read-through cache (in-memory)
+# Decorator pattern – get/batch_get go through a shared single-flight batch loader
+class LoadingProductRepository(ProductRepository):
+    def __init__(
+        self, loader: BatchLoader[str, ProductView], inner: ProductRepository
+    ) -> None:
+        self._loader = loader
+        self._inner = inner
+
+    async def get(self, product_id: str) -> Optional[ProductView]:
+        with stage("load"):
+            return await self._loader.load(product_id)
+
+    async def batch_get(self, ids: list[str]) -> Sequence[ProductView]:
+        with stage("load"):
+            loaded = await self._loader.load_many(list(dict.fromkeys(ids)))
+        return [p for p in loaded if p is not None]
+
+    async def search(self, query: str, limit: int = 20) -> Sequence[ProductView]:
+        return await self._inner.search(query, limit)
+
+
+def _product_size(p: ProductView) -> int:
+    # rough per-entry footprint: object + strings (+ boxed price)
+    size = sys.getsizeof(p) + sys.getsizeof(p.price)
+    for value in (p.id, p.title, p.description, p.currency, p.image_url):
+        if value is not None:
+            size += sys.getsizeof(value)
+    return size
+
+
+# Shared by every CachedProductRepository for the lifetime of the process
+product_cache: LruCache[ProductView] = LruCache(
+    max_entries=settings.product_cache_max_entries,
+    ttl_seconds=settings.product_cache_ttl_seconds,
+    max_bytes=settings.product_cache_max_bytes,
+    sizeof=_product_size,
+    # when full, only ids with a recent read rate displace older entries
+    admit=(
+        (lambda pid: hot_products.admit(pid, settings.hotkeys_admission_min_count))
+        if settings.hotkeys_cache_admission
+        else None
+    ),
+)
+
+
+async def warm_product_cache(
+    ids: Iterable[str],
+    fetch: Callable[[list[str]], Awaitable[Mapping[str, ProductView]]],
+    cache: LruCache[ProductView] = product_cache,
+) -> int:
+    """Load the given ids that are not cached (e.g. the hottest ids) into
+    ``cache`` with one batched ``fetch``; returns how many were loaded."""
+    missing = [pid for pid in ids if pid not in cache]
+    if not missing:
+        return 0
+    found = await fetch(missing)
+    for p in found.values():
+        cache.set(p.id, p)
+    return len(found)
+
+
+class CatalogVersion:
+    """Catalog-wide change counter, bumped on every ``product_changed`` event."""
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def bump(self) -> None:
+        self.value += 1
+
+
+catalog_version = CatalogVersion()
+
+
+# A cached first page: ranked product ids and the keyset cursor after them
+CachedPage = tuple[tuple[str, ...], Any]
+
+
+def _page_size(page: CachedPage) -> int:
+    ids, next_cursor = page
+    size = sys.getsizeof(page) + sys.getsizeof(ids) + sys.getsizeof(next_cursor)
+    return size + sum(sys.getsizeof(i) for i in ids)
+
+
+class SearchResultCache:
+    """Search results cached as product ids and keyed on the catalog version.
+
+    A catalog change bumps the version, which makes every older entry
+    unreachable; stale entries then age out of the LRU.
+    """
+
+    def __init__(self, cache: LruCache[CachedPage], version: CatalogVersion):
+        self._cache = cache
+        self._version = version
+
+    def key(self, strategy: str, query: str, limit: int, *extra: Hashable) -> tuple:
+        return (strategy, normalize_query(query), limit, *extra)
+
+    def get(self, key: tuple) -> Optional[CachedPage]:
+        return self._cache.get((self._version.value, *key))
+
+    def set(self, key: tuple, page: CachedPage) -> None:
+        self._cache.set((self._version.value, *key), page)
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "catalog_version": self._version.value}
+
+
+search_results = SearchResultCache(
+    LruCache(
+        max_entries=settings.search_cache_max_entries,
+        ttl_seconds=settings.search_cache_ttl_seconds,
+        max_bytes=settings.search_cache_max_bytes,
+        sizeof=_page_size,
+    ),
+    catalog_version,
+)
+
+
+def on_product_changed(event) -> None:
+    # published by whatever writes products: {"id": <product id>}
+    product_cache.delete(event["id"])
+    catalog_version.bump()
+
+
+domain_events.register("product_changed", on_product_changed)
+
+
+# Decorator pattern – read-through cache over the process-wide product_cache
 class CachedProductRepository(ProductRepository):
-    def __init__(self, inner: ProductRepository) -> None:
+    def __init__(
+        self,
+        inner: ProductRepository,
+        cache: LruCache[ProductView] = product_cache,
+        search_cache: SearchResultCache = search_results,
+    ) -> None:
         self._inner = inner
-        self._cache: dict[str, Product] = {}
+        self._cache = cache
+        self._search_cache = search_cache
 
-    async def get(self, product_id: str) -> Optional[Product]:
-        if product_id in self._cache:
-            return self._cache[product_id]
+    async def get(self, product_id: str) -> Optional[ProductView]:
+        with stage("cache"):
+            p = self._cache.get(product_id)
+        if p is not None:
+            # misses are published by the repository that reads them
+            domain_events.publish("product_read", p.id)
+            return p
         p = await self._inner.get(product_id)
         if p:
-            self._cache[product_id] = p
+            self._cache.set(product_id, p)
         return p
 
-    async def batch_get(self, ids: list[str]) -> Sequence[Product]:
-        result: list[Product] = []
+    async def batch_get(self, ids: list[str]) -> Sequence[ProductView]:
+        result: list[ProductView] = []
         missing: list[str] = []
-        for pid in ids:
-            if pid in self._cache:
-                result.append(self._cache[pid])
-            else:
-                missing.append(pid)
+        with stage("cache"):
+            for pid in ids:
+                p = self._cache.get(pid)
+                if p is not None:
+                    result.append(p)
+                else:
+                    missing.append(pid)
+        if result:
+            domain_events.publish_many("product_read", [p.id for p in result])
         if missing:
             fetched = await self._inner.batch_get(missing)
             for p in fetched:
-                self._cache[p.id] = p
+                self._cache.set(p.id, p)
             result.extend(fetched)
         return result
 
-    async def search(self, query: str, limit: int = 20) -> Sequence[Product]:
-        # let inner handle; caching full searches is often less useful
-        return await self._inner.search(query, limit)
+    async def search(self, query: str, limit: int = 20) -> Sequence[ProductView]:
+        async def run() -> SearchPage:
+            return SearchPage(list(await self._inner.search(query, limit)))
+
+        key = self._search_cache.key("repository", query, limit)
+        return (await self.cached_search(key, run)).products
+
+    async def cached_search(
+        self,
+        key: tuple,
+        run: Callable[[], Awaitable[SearchPage]],
+        should_cache: Optional[Callable[[], bool]] = None,
+    ) -> SearchPage:
+        """Serve a first search page from the result cache, or ``run`` it and
+        cache its ids.
+
+        Hits are re-hydrated through the product cache, in ranked order.
+        ``should_cache`` can veto caching a result (e.g. a degraded search).
+        Only first pages are cached: later pages go through ``run`` directly.
+        """
+        with stage("cache"):
+            cached = self._search_cache.get(key)
+        if cached is not None:
+            ids, next_cursor = cached
+            found = {p.id: p for p in await self.batch_get(list(ids))}
+            return SearchPage([found[pid] for pid in ids if pid in found], next_cursor)
+        page = await run()
+        if should_cache is not None and not should_cache():
+            return page
+        self._search_cache.set(
+            key, (tuple(p.id for p in page.products), page.next_cursor)
+        )
+        for p in page.products:
+            self._cache.set(p.id, p)
+        return page
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rproduct.proto\x12\ncatalog.v1\"\x1f\n\x11GetProductRequest\x12\n\n\x02id\x18\x01 \x01(\t\"&\n\x17\x42\x61tchGetProductsRequest\x12\x0b\n\x03ids\x18\x01 \x03(\t\"5\n\x15SearchProductsRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\"m\n\x07Product\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\r\n\x05price\x18\x04 \x01(\x01\x12\x10\n\x08\x63urrency\x18\x05 \x01(\t\x12\x11\n\timage_url\x18\x06 \x01(\t\"A\n\x18\x42\x61tchGetProductsResponse\x12%\n\x08products\x18\x01 \x03(\x0b\x32\x13.catalog.v1.Product\"?\n\x16SearchProductsResponse\x12%\n\x08products\x18\x01 \x03(\x0b\x32\x13.catalog.v1.Product2\x8a\x02\n\x0e\x43\x61talogService\x12@\n\nGetProduct\x12\x1d.catalog.v1.GetProductRequest\x1a\x13.catalog.v1.Product\x12]\n\x10\x42\x61tchGetProducts\x12#.catalog.v1.BatchGetProductsRequest\x1a$.catalog.v1.BatchGetProductsResponse\x12W\n\x0eSearchProducts\x12!.catalog.v1.SearchProductsRequest\x1a\".catalog.v1.SearchProductsResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\rproduct.proto\x12\ncatalog.v1\"\x1f\n\x11GetProductRequest\x12\n\n\x02id\x18\x01 \x01(\t\"&\n\x17\x42\x61tchGetProductsRequest\x12\x0b\n\x03ids\x18\x01 \x03(\t\"l\n\x15SearchProductsRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x11\n\tef_search\x18\x03 \x01(\x05\x12\x0e\n\x06probes\x18\x04 \x01(\x05\x12\x12\n\npage_token\x18\x05 \x01(\t\"m\n\x07Product\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05title\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\r\n\x05price\x18\x04 \x01(\x01\x12\x10\n\x08\x63urrency\x18\x05 \x01(\t\x12\x11\n\timage_url\x18\x06 \x01(\t\"A\n\x18\x42\x61tchGetProductsResponse\x12%\n\x08products\x18\x01 \x03(\x0b\x32\x13.catalog.v1.Product\"X\n\x16SearchProductsResponse\x12%\n\x08products\x18\x01 \x03(\x0b\x32\x13.catalog.v1.Product\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t2\xd2\x03\n\x0e\x43\x61talogService\x12@\n\nGetProduct\x12\x1d.catalog.v1.GetProductRequest\x1a\x13.catalog.v1.Product\x12]\n\x10\x42\x61tchGetProducts\x12#.catalog.v1.BatchGetProductsRequest\x1a$.catalog.v1.BatchGetProductsResponse\x12W\n\x0eSearchProducts\x12!.catalog.v1.SearchProductsRequest\x1a\".catalog.v1.SearchProductsResponse\x12\x65\n\x16StreamBatchGetProducts\x12#.catalog.v1.BatchGetProductsRequest\x1a$.catalog.v1.BatchGetProductsResponse0\x01\x12_\n\x14StreamSearchProducts\x12!.catalog.v1.SearchProductsRequest\x1a\".catalog.v1.SearchProductsResponse0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -36,13 +36,13 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_BATCHGETPRODUCTSREQUEST']._serialized_start=62
   _globals['_BATCHGETPRODUCTSREQUEST']._serialized_end=100
   _globals['_SEARCHPRODUCTSREQUEST']._serialized_start=102
-  _globals['_SEARCHPRODUCTSREQUEST']._serialized_end=155
-  _globals['_PRODUCT']._serialized_start=157
-  _globals['_PRODUCT']._serialized_end=266
-  _globals['_BATCHGETPRODUCTSRESPONSE']._serialized_start=268
-  _globals['_BATCHGETPRODUCTSRESPONSE']._serialized_end=333
-  _globals['_SEARCHPRODUCTSRESPONSE']._serialized_start=335
-  _globals['_SEARCHPRODUCTSRESPONSE']._serialized_end=398
-  _globals['_CATALOGSERVICE']._serialized_start=401
-  _globals['_CATALOGSERVICE']._serialized_end=667
+  _globals['_SEARCHPRODUCTSREQUEST']._serialized_end=210
+  _globals['_PRODUCT']._serialized_start=212
+  _globals['_PRODUCT']._serialized_end=321
+  _globals['_BATCHGETPRODUCTSRESPONSE']._serialized_start=323
+  _globals['_BATCHGETPRODUCTSRESPONSE']._serialized_end=388
+  _globals['_SEARCHPRODUCTSRESPONSE']._serialized_start=390
+  _globals['_SEARCHPRODUCTSRESPONSE']._serialized_end=478
+  _globals['_CATALOGSERVICE']._serialized_start=481
+  _globals['_CATALOGSERVICE']._serialized_end=947
 # @@protoc_insertion_point(module_scope)
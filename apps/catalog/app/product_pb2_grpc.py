@@ -55,6 +55,18 @@ class CatalogServiceStub(object):
             response_deserializer=product__pb2.SearchProductsResponse.FromString,
             _registered_method=True,
         )
+        self.StreamBatchGetProducts = channel.unary_stream(
+            "/catalog.v1.CatalogService/StreamBatchGetProducts",
+            request_serializer=product__pb2.BatchGetProductsRequest.SerializeToString,
+            response_deserializer=product__pb2.BatchGetProductsResponse.FromString,
+            _registered_method=True,
+        )
+        self.StreamSearchProducts = channel.unary_stream(
+            "/catalog.v1.CatalogService/StreamSearchProducts",
+            request_serializer=product__pb2.SearchProductsRequest.SerializeToString,
+            response_deserializer=product__pb2.SearchProductsResponse.FromString,
+            _registered_method=True,
+        )
 
 
 class CatalogServiceServicer(object):
@@ -78,6 +90,18 @@ class CatalogServiceServicer(object):
         context.set_details("Method not implemented!")
         raise NotImplementedError("Method not implemented!")
 
+    def StreamBatchGetProducts(self, request, context):
+        """Server-streaming variants: products are sent in chunks as rows are read"""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
+    def StreamSearchProducts(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details("Method not implemented!")
+        raise NotImplementedError("Method not implemented!")
+
 
 def add_CatalogServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -96,6 +120,16 @@ def add_CatalogServiceServicer_to_server(servicer, server):
             request_deserializer=product__pb2.SearchProductsRequest.FromString,
             response_serializer=product__pb2.SearchProductsResponse.SerializeToString,
         ),
+        "StreamBatchGetProducts": grpc.unary_stream_rpc_method_handler(
+            servicer.StreamBatchGetProducts,
+            request_deserializer=product__pb2.BatchGetProductsRequest.FromString,
+            response_serializer=product__pb2.BatchGetProductsResponse.SerializeToString,
+        ),
+        "StreamSearchProducts": grpc.unary_stream_rpc_method_handler(
+            servicer.StreamSearchProducts,
+            request_deserializer=product__pb2.SearchProductsRequest.FromString,
+            response_serializer=product__pb2.SearchProductsResponse.SerializeToString,
+        ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
         "catalog.v1.CatalogService", rpc_method_handlers
@@ -199,3 +233,63 @@ class CatalogService(object):
             metadata,
             _registered_method=True,
         )
+
+    @staticmethod
+    def StreamBatchGetProducts(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            "/catalog.v1.CatalogService/StreamBatchGetProducts",
+            product__pb2.BatchGetProductsRequest.SerializeToString,
+            product__pb2.BatchGetProductsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
+
+    @staticmethod
+    def StreamSearchProducts(
+        request,
+        target,
+        options=(),
+        channel_credentials=None,
+        call_credentials=None,
+        insecure=False,
+        compression=None,
+        wait_for_ready=None,
+        timeout=None,
+        metadata=None,
+    ):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            "/catalog.v1.CatalogService/StreamSearchProducts",
+            product__pb2.SearchProductsRequest.SerializeToString,
+            product__pb2.SearchProductsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True,
+        )
@@ -1,31 +1,67 @@
 import asyncio
+import signal
+import socket
 import uvicorn
+from contextlib import contextmanager
 from .api.http import router as http_router
 from fastapi import FastAPI
+from .config import settings
 from .grpc.server import serve as grpc_serve
+from .supervisor import worker_count, worker_http_ports, worker_index
 
 http_app = FastAPI(title="catalog-http", version="1.0.0")
 http_app.include_router(http_router)
 
-import logging, sys
+from .telemetry import configure_logging
 
-logging.basicConfig(
-    level=logging.INFO,
-    stream=sys.stdout,
-    format="%(asctime)s %(levelname)s %(name)s %(message)s",
-)
+configure_logging()
+
+
+class HttpServer(uvicorn.Server):
+    # shutdown is driven by main(), which owns SIGTERM/SIGINT
+    @contextmanager
+    def capture_signals(self):
+        yield
+
+
+def listen_socket(port: int, reuse_port: bool) -> socket.socket:
+    # SO_REUSEPORT: supervisor workers each bind the same port
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(("0.0.0.0", port))
+    return sock
 
 
 async def main():
+    # SIGTERM/SIGINT: both servers drain (see grpc.server.serve)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
     # gRPC server
-    grpc_task = asyncio.create_task(grpc_serve())
+    grpc_task = asyncio.create_task(grpc_serve(stop))
 
     # HTTP server
-    config = uvicorn.Config(http_app, host="0.0.0.0", port=8080, log_level="info")
-    server = uvicorn.Server(config)
-    http_task = asyncio.create_task(server.serve())
+    config = uvicorn.Config(
+        http_app,
+        log_level="info",
+        timeout_graceful_shutdown=settings.shutdown_grace_seconds,
+    )
+    server = HttpServer(config)
+    sockets = [listen_socket(settings.http_port, reuse_port=worker_count() > 1)]
+    own_ports = worker_http_ports()
+    if own_ports:
+        sockets.append(listen_socket(own_ports[worker_index()], reuse_port=False))
+    http_task = asyncio.create_task(server.serve(sockets=sockets))
+
+    async def stop_http():
+        await stop.wait()
+        server.should_exit = True
 
-    await asyncio.gather(grpc_task, http_task)
+    await asyncio.gather(grpc_task, http_task, stop_http())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+from array import array
+from typing import Awaitable, Callable, Sequence
+from ..config import settings
+from ..infrastructure.cache import LruCache, normalize_query
+from ..infrastructure.loader import BatchLoader
+
+BatchEmbedFn = Callable[[list[str]], Awaitable[Sequence[Sequence[float]]]]
+
+
+def _embedding_size(vec: array) -> int:
+    return vec.buffer_info()[1] * vec.itemsize + 64
+
+
+# Process-wide query-embedding cache, keyed by normalized query
+embedding_cache: LruCache[array] = LruCache(
+    max_entries=settings.embedding_cache_max_entries,
+    ttl_seconds=settings.embedding_cache_ttl_seconds,
+    max_bytes=settings.embedding_cache_max_bytes,
+    sizeof=_embedding_size,
+)
+
+
+class QueryEmbedder:
+    """Cached, batching front for a batch embedding function.
+
+    Usable as ``embedding_fn``: ``await embedder(query)``. Cache misses from
+    concurrent requests within ``window_seconds`` go to the embedder in one
+    ``batch_embed_fn`` call, and identical in-flight queries share one result.
+    """
+
+    def __init__(
+        self,
+        batch_embed_fn: BatchEmbedFn,
+        cache: LruCache[array] = embedding_cache,
+        window_seconds: float = 0.005,
+        max_batch: int = 64,
+    ) -> None:
+        self._batch_embed = batch_embed_fn
+        self._cache = cache
+        self._loader: BatchLoader[str, array] = BatchLoader(
+            self._embed_batch, window_seconds, max_batch
+        )
+
+    async def __call__(self, query: str) -> array:
+        key = normalize_query(query)
+        vec = self._cache.get(key)
+        if vec is None:
+            vec = await self._loader.load(key)
+            self._cache.set(key, vec)
+        return vec
+
+    async def _embed_batch(self, queries: list[str]) -> dict[str, array]:
+        vectors = await self._batch_embed(queries)
+        if len(vectors) != len(queries):
+            # zip would silently leave some queries without a vector
+            raise ValueError(
+                f"embedding batch returned {len(vectors)} vectors "
+                f"for {len(queries)} queries"
+            )
+        # compact float64 arrays: 12 KB per 1536-d vector instead of ~50 KB lists
+        return {q: array("d", v) for q, v in zip(queries, vectors)}
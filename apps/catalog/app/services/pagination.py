@@ -0,0 +1,46 @@
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Callable
+from ..infrastructure.cache import normalize_query
+
+
+class InvalidPageToken(ValueError):
+    pass
+
+
+def _fingerprint(strategy: str, query: str) -> str:
+    # binds a token to the search it came from; not a signature
+    key = f"{strategy}\x00{normalize_query(query)}".encode()
+    return hashlib.blake2s(key, digest_size=6).hexdigest()
+
+
+def encode_page_token(strategy: str, query: str, cursor: Any) -> str:
+    """Opaque page token wrapping a keyset cursor (never an OFFSET)."""
+    payload = json.dumps(
+        {"f": _fingerprint(strategy, query), "c": cursor}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def decode_page_token(
+    token: str,
+    strategy: str,
+    query: str,
+    valid_cursor: Callable[[Any], bool] = lambda cursor: True,
+) -> Any:
+    """Return the cursor in ``token``; InvalidPageToken unless it was issued
+    for this search and ``valid_cursor`` accepts its shape."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        fingerprint, cursor = payload["f"], payload["c"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidPageToken("malformed page token") from e
+    if fingerprint != _fingerprint(strategy, query):
+        raise InvalidPageToken("page token belongs to a different search")
+    # the fingerprint is not a signature: the cursor is client input
+    if cursor is None or not valid_cursor(cursor):
+        raise InvalidPageToken("malformed page token")
+    return cursor
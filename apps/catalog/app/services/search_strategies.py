@@ -1,85 +1,586 @@
+import asyncio
+import logging
+import math
 from abc import ABC, abstractmethod
-from typing import Sequence
+from typing import Any, AsyncIterator, Callable, Optional, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from ..domain.models import Product
+from ..config import settings
+from ..domain.models import ProductView, SearchPage
+from ..timing import stage
+
+logger = logging.getLogger("catalog.search")
+
+# Columns the read paths serialize, in ProductView field order (no embedding)
+_VIEW_COLUMNS = "id, title, description, price, currency, image_url"
+_N_VIEW_COLUMNS = 6
+
+
+def _is_score_cursor(cursor: Any) -> bool:
+    # [score or distance, id], as built by _page for ranked strategies
+    return (
+        isinstance(cursor, list)
+        and len(cursor) == 2
+        and isinstance(cursor[0], (int, float))
+        and not isinstance(cursor[0], bool)
+        and math.isfinite(cursor[0])
+        and isinstance(cursor[1], str)
+    )
+
+
+def _page(rows, limit: int, cursor_of: Callable[[Any], Any]) -> SearchPage:
+    # rows: view columns, then the sort key(s) the keyset cursor is built from
+    with stage("hydrate"):
+        products = [ProductView(*row[:_N_VIEW_COLUMNS]) for row in rows]
+        cursors = [cursor_of(row) for row in rows]
+    next_cursor = cursors[-1] if cursors and len(rows) >= limit else None
+    return SearchPage(products, next_cursor, cursors)
 
 
 class SearchStrategy(ABC):
+    # set by composites when a search returned partial results
+    degraded: bool = False
+
     @abstractmethod
+    async def search_page(
+        self, session: AsyncSession, query: str, limit: int, cursor: Any = None
+    ) -> SearchPage:
+        """Return up to ``limit`` results ranked after keyset ``cursor``."""
+
     async def search(
         self, session: AsyncSession, query: str, limit: int
-    ) -> Sequence[Product]: ...
+    ) -> Sequence[ProductView]:
+        return (await self.search_page(session, query, limit)).products
+
+    @abstractmethod
+    def valid_cursor(self, cursor: Any) -> bool:
+        """Whether ``cursor`` (decoded from a client's page token) has this
+        strategy's cursor shape."""
+
+    @abstractmethod
+    async def ranked_before(
+        self, session: AsyncSession, query: str, ids: Sequence[str], cursor: Any
+    ) -> set[str]:
+        """Return the ``ids`` this strategy matches at or before keyset ``cursor``.
+
+        ``cursor`` None (first page) matches nothing; False (exhausted) stands
+        for the end of the ranking. Lets composites skip results another leg
+        has already returned.
+        """
+
+    async def stream(
+        self, session: AsyncSession, query: str, limit: int, chunk_size: int
+    ) -> AsyncIterator[list[ProductView]]:
+        # default: one keyset page per chunk, so only a chunk is held at a
+        # time; strategies that can read from a server-side cursor override this
+        cursor = None
+        remaining = limit
+        while remaining > 0:
+            page = await self.search_page(
+                session, query, min(chunk_size, remaining), cursor
+            )
+            if page.products:
+                remaining -= len(page.products)
+                yield page.products
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
 
 
 class KeywordSearchStrategy(SearchStrategy):
-    async def search(
-        self, session: AsyncSession, query: str, limit: int
-    ) -> Sequence[Product]:
+    def valid_cursor(self, cursor: Any) -> bool:
+        return isinstance(cursor, str)
+
+    async def search_page(
+        self, session: AsyncSession, query: str, limit: int, cursor: Any = None
+    ) -> SearchPage:
+        # keyset on id: the cursor is the last id returned
+        after = "AND id > :after_id" if cursor is not None else ""
         stmt = text(
-            """
-            SELECT * FROM products
-            WHERE title ILIKE :q OR description ILIKE :q
+            f"""
+            SELECT {_VIEW_COLUMNS} FROM products
+            WHERE (title ILIKE :q OR description ILIKE :q) {after}
             ORDER BY id
             LIMIT :limit
         """
         )
-        res = await session.execute(stmt, {"q": f"%{query}%", "limit": limit})
-        return res.scalars().all()
+        params = {"q": f"%{query}%", "limit": limit}
+        if cursor is not None:
+            params["after_id"] = cursor
+        with stage("sql"):
+            res = await session.execute(stmt, params)
+            rows = res.all()
+        return _page(rows, limit, lambda row: row.id)
+
+    async def ranked_before(
+        self, session: AsyncSession, query: str, ids: Sequence[str], cursor: Any
+    ) -> set[str]:
+        if cursor is None or not ids:
+            return set()
+        before = "AND id <= :after_id" if cursor is not False else ""
+        stmt = text(
+            f"""
+            SELECT id FROM products
+            WHERE id = ANY(:ids) AND (title ILIKE :q OR description ILIKE :q) {before}
+        """
+        )
+        params = {"q": f"%{query}%", "ids": list(ids)}
+        if cursor is not False:
+            params["after_id"] = cursor
+        with stage("sql"):
+            res = await session.execute(stmt, params)
+            return set(res.scalars())
+
+
+class FullTextSearchStrategy(SearchStrategy):
+    """Keyword search served by the GIN indexes from 0002_search_indexes.
+
+    Matches the generated ``search_tsv`` column or trigram similarity on the
+    title, ranked by relevance instead of ``ORDER BY id``. Pages resume after
+    the (score, id) of the previous page's last row.
+    """
+
+    _matches = f"""
+        SELECT {_VIEW_COLUMNS},
+               GREATEST(ts_rank_cd(search_tsv, tsq), similarity(title, :q)) AS score
+        FROM products, websearch_to_tsquery('simple', :q) AS tsq
+        WHERE search_tsv @@ tsq OR title % :q
+    """
+    _first_page = text(
+        f"SELECT * FROM ({_matches}) AS m ORDER BY score DESC, id LIMIT :limit"
+    )
+    _next_page = text(
+        f"""
+        SELECT * FROM ({_matches}) AS m
+        WHERE score < :score OR (score = :score AND id > :after_id)
+        ORDER BY score DESC, id
+        LIMIT :limit
+    """
+    )
+
+    _matching = text(f"SELECT id FROM ({_matches}) AS m WHERE id = ANY(:ids)")
+    _matching_before = text(
+        f"""
+        SELECT id FROM ({_matches}) AS m
+        WHERE id = ANY(:ids)
+          AND (score > :score OR (score = :score AND id <= :after_id))
+    """
+    )
+
+    def valid_cursor(self, cursor: Any) -> bool:
+        return _is_score_cursor(cursor)
+
+    async def search_page(
+        self, session: AsyncSession, query: str, limit: int, cursor: Any = None
+    ) -> SearchPage:
+        params = {"q": query, "limit": limit}
+        stmt = self._first_page
+        if cursor is not None:
+            params["score"], params["after_id"] = cursor
+            stmt = self._next_page
+        with stage("sql"):
+            res = await session.execute(stmt, params)
+            rows = res.all()
+        return _page(rows, limit, lambda row: [row.score, row.id])
+
+    async def ranked_before(
+        self, session: AsyncSession, query: str, ids: Sequence[str], cursor: Any
+    ) -> set[str]:
+        if cursor is None or not ids:
+            return set()
+        params = {"q": query, "ids": list(ids)}
+        stmt = self._matching
+        if cursor is not False:
+            params["score"], params["after_id"] = cursor
+            stmt = self._matching_before
+        with stage("sql"):
+            res = await session.execute(stmt, params)
+            return set(res.scalars())
+
+    async def stream(
+        self, session: AsyncSession, query: str, limit: int, chunk_size: int
+    ) -> AsyncIterator[list[ProductView]]:
+        res = await session.stream(
+            self._first_page.execution_options(yield_per=chunk_size),
+            {"q": query, "limit": limit},
+        )
+        async for rows in res.partitions():
+            yield [ProductView(*row[:_N_VIEW_COLUMNS]) for row in rows]
+
+
+# rows fetched past the limit in index order, so the outer (distance, id)
+# sort sees every row tied with the page's last distance
+_TIE_MARGIN = 32
 
 
 class VectorSearchStrategy(SearchStrategy):
-    def __init__(self, embedding_fn) -> None:
+    def __init__(self, embedding_fn, ef_search: int = 0, probes: int = 0) -> None:
         self._embed = embedding_fn  # e.g. async call to embedding service
+        # ANN index knobs (hnsw.ef_search / ivfflat.probes); 0 = server default
+        self._ef_search = ef_search
+        self._probes = probes
 
-    async def search(
-        self, session: AsyncSession, query: str, limit: int
-    ) -> Sequence[Product]:
-        vec = await self._embed(query)  # returns list[float] of length dim
+    def valid_cursor(self, cursor: Any) -> bool:
+        return _is_score_cursor(cursor)
+
+    async def search_page(
+        self, session: AsyncSession, query: str, limit: int, cursor: Any = None
+    ) -> SearchPage:
+        with stage("embed"):
+            vec = await self._embed(query)  # returns list[float] of length dim
+        await self._apply_ann_settings(session)
+        # pages resume after the (distance, id) of the previous page's last
+        # row. The ANN index only serves ORDER BY <the bare distance>, so it
+        # drives the inner query and the outer one breaks ties on id.
+        params = {
+            "vec": _vector_literal(vec),
+            "limit": limit,
+            "fetch": limit + _TIE_MARGIN,
+        }
+        after = ""
+        if cursor is not None:
+            params["distance"], params["after_id"] = cursor
+            after = """AND (embedding <-> CAST(:vec AS vector) > :distance
+                 OR (embedding <-> CAST(:vec AS vector) = :distance
+                     AND id > :after_id))"""
         stmt = text(
-            """
-            SELECT * FROM products
-            WHERE embedding IS NOT NULL
-            ORDER BY embedding <-> :vec
+            f"""
+            SELECT * FROM (
+                SELECT {_VIEW_COLUMNS},
+                       embedding <-> CAST(:vec AS vector) AS distance
+                FROM products
+                WHERE embedding IS NOT NULL {after}
+                ORDER BY embedding <-> CAST(:vec AS vector)
+                LIMIT :fetch
+            ) AS nearest
+            ORDER BY distance, id
             LIMIT :limit
         """
         )
-        res = await session.execute(stmt, {"vec": vec, "limit": limit})
-        return res.scalars().all()
+        with stage("sql"):
+            res = await session.execute(stmt, params)
+            rows = res.all()
+        page = _page(rows, limit, lambda row: [row.distance, row.id])
+        if rows and page.next_cursor is None:
+            # an index scan can stop short (ef_search, max_scan_tuples) before
+            # the table runs out: only an empty page ends the results
+            page.next_cursor = page.cursors[-1]
+        return page
+
+    async def ranked_before(
+        self, session: AsyncSession, query: str, ids: Sequence[str], cursor: Any
+    ) -> set[str]:
+        if cursor is None or not ids:
+            return set()
+        with stage("embed"):
+            vec = await self._embed(query)
+        params = {"vec": _vector_literal(vec), "ids": list(ids)}
+        before = ""
+        if cursor is not False:
+            params["distance"], params["after_id"] = cursor
+            before = """AND (embedding <-> CAST(:vec AS vector) < :distance
+                 OR (embedding <-> CAST(:vec AS vector) = :distance
+                     AND id <= :after_id))"""
+        stmt = text(
+            f"""
+            SELECT id FROM products
+            WHERE id = ANY(:ids) AND embedding IS NOT NULL {before}
+        """
+        )
+        with stage("sql"):
+            res = await session.execute(stmt, params)
+            return set(res.scalars())
+
+    async def _apply_ann_settings(self, session: AsyncSession) -> None:
+        # set_config(..., true) == SET LOCAL: scoped to the session's transaction
+        knobs = [
+            ("hnsw.ef_search", self._ef_search),
+            ("ivfflat.probes", self._probes),
+            # pgvector >= 0.8: keep walking the index past ef_search / probes
+            # and past rows the keyset filter drops, so every page fills up
+            # to the limit; IVFFlat only scans iteratively in relaxed order,
+            # which the outer (distance, id) sort puts back in order
+            ("hnsw.iterative_scan", "strict_order"),
+            ("ivfflat.iterative_scan", "relaxed_order"),
+        ]
+        for name, value in knobs:
+            if value:
+                await session.execute(
+                    text("SELECT set_config(:name, :value, true)"),
+                    {"name": name, "value": str(value)},
+                )
+
+
+# hnsw.iterative_scan, which fills vector pages past ef_search, is 0.8+
+MIN_PGVECTOR_VERSION = (0, 8)
+
+
+async def check_pgvector_version(session: AsyncSession) -> str:
+    """Return the installed pgvector version; RuntimeError if it is too old."""
+    res = await session.execute(
+        text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    )
+    version = res.scalar_one_or_none()
+    if version is None:
+        raise RuntimeError("the pgvector extension is not installed")
+    numbers = tuple(int(part) for part in version.split(".")[:2])
+    if numbers < MIN_PGVECTOR_VERSION:
+        raise RuntimeError(
+            f"pgvector {version} is installed; vector search pagination needs "
+            f">= {'.'.join(map(str, MIN_PGVECTOR_VERSION))} (hnsw.iterative_scan)"
+        )
+    return version
+
+
+def _vector_literal(vec: Sequence[float]) -> str:
+    # pgvector text format; bound as text and cast so the ANN index applies
+    return "[" + ",".join(map(str, vec)) + "]"
+
+
+def reciprocal_rank_scores(
+    rankings: Sequence[tuple[Sequence[ProductView], float]], k: int = 60
+) -> dict[str, float]:
+    """score(d) = sum(weight / (k + rank)) over the ranked lists containing d."""
+    scores: dict[str, float] = {}
+    for ranked, weight in rankings:
+        for rank, item in enumerate(ranked, start=1):
+            scores[item.id] = scores.get(item.id, 0.0) + weight / (k + rank)
+    return scores
 
 
 class HybridSearchStrategy(SearchStrategy):
-    """Composite: combines two strategies, merges results."""
+    """Composite: runs two strategies concurrently and fuses their rankings.
 
-    def __init__(self, primary: SearchStrategy, secondary: SearchStrategy) -> None:
+    With a ``session_factory`` each leg runs on its own session (pooled
+    connection) under its own timeout; a leg that fails or overruns is dropped
+    and the other leg's results are returned. Without one, both legs share the
+    caller's session and run one after the other.
+
+    A page merges the legs' rankings by reciprocal-rank score, always taking
+    the better of the two legs' next results, so each leg's keyset cursor
+    sits right after what that leg has contributed. The page cursor is just
+    the two leg cursors: a leg skips results the other leg ranks before its
+    own cursor (``ranked_before``), as those were returned already.
+    """
+
+    def __init__(
+        self,
+        primary: SearchStrategy,
+        secondary: SearchStrategy,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        timeouts: tuple[Optional[float], Optional[float]] = (None, None),
+        weights: tuple[float, float] = (1.0, 1.0),
+        rrf_k: int = 60,
+    ) -> None:
         self._primary = primary
         self._secondary = secondary
+        self._session_factory = session_factory
+        self._timeouts = timeouts
+        self._weights = weights
+        self._rrf_k = rrf_k
 
-    async def search(
-        self, session: AsyncSession, query: str, limit: int
-    ) -> Sequence[Product]:
-        p = await self._primary.search(session, query, limit)
-        s = await self._secondary.search(session, query, limit)
-        seen = set()
-        merged = []
-        for item in list(p) + list(s):
-            if item.id not in seen:
-                seen.add(item.id)
-                merged.append(item)
-            if len(merged) >= limit:
+    def valid_cursor(self, cursor: Any) -> bool:
+        if not isinstance(cursor, dict) or not isinstance(cursor.get("legs"), list):
+            return False
+        legs = cursor["legs"]
+        return len(legs) == 2 and all(
+            leg_cursor is None or leg_cursor is False or leg.valid_cursor(leg_cursor)
+            for leg, leg_cursor in zip((self._primary, self._secondary), legs)
+        )
+
+    async def search_page(
+        self, session: AsyncSession, query: str, limit: int, cursor: Any = None
+    ) -> SearchPage:
+        legs = (self._primary, self._secondary)
+        # per leg: None = first page, False = exhausted, else the leg's cursor
+        leg_cursors = cursor["legs"] if cursor else [None, None]
+        runs = list(
+            zip(legs, legs[::-1], self._timeouts, leg_cursors, leg_cursors[::-1])
+        )
+        if self._session_factory is None:
+            results = []
+            for run in runs:
+                try:
+                    results.append(await self._run_leg(session, query, limit, *run))
+                except Exception as e:
+                    results.append(e)
+        else:
+            results = await asyncio.gather(
+                *(self._run_leg(None, query, limit, *run) for run in runs),
+                return_exceptions=True,
+            )
+        errors = []
+        for leg, result in zip(legs, results):
+            if isinstance(result, BaseException):
+                logger.warning(
+                    "search leg %s dropped: %r",
+                    type(leg).__name__,
+                    result,
+                    extra={"leg": type(leg).__name__, "error": repr(result)},
+                )
+                errors.append(result)
+        if len(errors) == len(legs):
+            raise errors[0]
+        self.degraded = bool(errors) or any(
+            r[1] is None for r in results if not isinstance(r, BaseException)
+        )
+        with stage("fuse"):
+            return self._merge(leg_cursors, results, limit)
+
+    def _merge(self, leg_cursors: list, results: list, limit: int) -> SearchPage:
+        # per live leg: its page, the ids to skip and the merge position
+        live = []
+        for i, result in enumerate(results):
+            if not isinstance(result, BaseException):
+                page, returned = result
+                live.append([i, page, returned or set(), 0])
+        scores = reciprocal_rank_scores(
+            [(page.products, self._weights[i]) for i, page, _, _ in live], self._rrf_k
+        )
+        fused: list[ProductView] = []
+        taken: set[str] = set()
+        while True:
+            heads = []
+            blocked = False
+            for state in live:
+                _, page, returned, pos = state
+                while pos < len(page.products) and (
+                    page.products[pos].id in taken or page.products[pos].id in returned
+                ):
+                    pos += 1
+                state[3] = pos
+                if pos < len(page.products):
+                    heads.append(page.products[pos])
+                elif page.next_cursor is not None:
+                    # this leg's next result is unknown: stop rather than
+                    # let the other leg run ahead of it
+                    blocked = True
+            if blocked or not heads or len(fused) >= limit:
                 break
-        return merged
+            # ties go to the primary leg (max keeps the first maximum)
+            best = max(heads, key=lambda p: scores[p.id])
+            fused.append(best)
+            taken.add(best.id)
+
+        next_legs = list(leg_cursors)
+        more = False
+        for i, page, _, pos in live:
+            if pos == len(page.products) and page.next_cursor is None:
+                next_legs[i] = False
+            else:
+                if pos:
+                    next_legs[i] = page.cursors[pos - 1]
+                more = True
+        if len(live) < len(results):
+            # failed leg: retried from the same position next page
+            more = more or bool(fused)
+        return SearchPage(fused, {"legs": next_legs} if more else None)
+
+    async def ranked_before(
+        self, session: AsyncSession, query: str, ids: Sequence[str], cursor: Any
+    ) -> set[str]:
+        # returned so far = ranked before either leg's cursor
+        if cursor is None or not ids:
+            return set()
+        legs = (self._primary, self._secondary)
+        leg_cursors = [False, False] if cursor is False else cursor["legs"]
+        returned: set[str] = set()
+        for leg, leg_cursor in zip(legs, leg_cursors):
+            rest = [pid for pid in ids if pid not in returned]
+            returned |= await leg.ranked_before(session, query, rest, leg_cursor)
+        return returned
+
+    async def _run_leg(
+        self,
+        session: Optional[AsyncSession],
+        query: str,
+        limit: int,
+        leg: SearchStrategy,
+        other: SearchStrategy,
+        timeout: Optional[float],
+        cursor: Any,
+        other_cursor: Any,
+    ) -> tuple[SearchPage, Optional[set[str]]]:
+        """The leg's next page and the ids on it the other leg already returned.
+
+        The id set is None when that lookup failed: the page is still used,
+        at the risk of repeating a result.
+        """
+        if cursor is False:
+            return SearchPage([]), set()
+        if session is not None:
+            return await asyncio.wait_for(
+                self._leg_page(session, query, limit, leg, other, cursor, other_cursor),
+                timeout,
+            )
+        async with self._session_factory() as leg_session:
+            return await asyncio.wait_for(
+                self._leg_page(
+                    leg_session, query, limit, leg, other, cursor, other_cursor
+                ),
+                timeout,
+            )
+
+    @staticmethod
+    async def _leg_page(
+        session: AsyncSession,
+        query: str,
+        limit: int,
+        leg: SearchStrategy,
+        other: SearchStrategy,
+        cursor: Any,
+        other_cursor: Any,
+    ) -> tuple[SearchPage, Optional[set[str]]]:
+        page = await leg.search_page(session, query, limit, cursor)
+        try:
+            returned = await other.ranked_before(
+                session, query, [p.id for p in page.products], other_cursor
+            )
+        except Exception as e:
+            logger.warning(
+                "search leg dedup against %s failed: %r",
+                type(other).__name__,
+                e,
+                extra={"leg": type(other).__name__, "error": repr(e)},
+            )
+            returned = None
+        return page, returned
 
 
 class SearchStrategyFactory:
-    def __init__(self, session: AsyncSession, embedding_fn=None) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        embedding_fn=None,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+    ) -> None:
         self._session = session
         self._embedding_fn = embedding_fn
+        # lets composite strategies run their legs on separate sessions
+        self._session_factory = session_factory
 
-    def create(self, query: str) -> SearchStrategy:
+    def create(
+        self, query: str, ef_search: int = 0, probes: int = 0, streaming: bool = False
+    ) -> SearchStrategy:
         # simple heuristic: short queries → hybrid, long queries → vector
         if self._embedding_fn:
-            keyword = KeywordSearchStrategy()
-            vector = VectorSearchStrategy(self._embedding_fn)
-            return HybridSearchStrategy(keyword, vector)
-        return KeywordSearchStrategy()
+            keyword = FullTextSearchStrategy()
+            vector = VectorSearchStrategy(self._embedding_fn, ef_search, probes)
+            # streamed exports get a per-page budget, not the interactive one
+            timeouts = (
+                (settings.stream_search_leg_timeout_ms / 1000,) * 2
+                if streaming
+                else (
+                    settings.hybrid_keyword_timeout_ms / 1000,
+                    settings.hybrid_vector_timeout_ms / 1000,
+                )
+            )
+            return HybridSearchStrategy(
+                keyword,
+                vector,
+                session_factory=self._session_factory,
+                timeouts=timeouts,
+                weights=(settings.hybrid_keyword_weight, settings.hybrid_vector_weight),
+                rrf_k=settings.hybrid_rrf_k,
+            )
+        return FullTextSearchStrategy()
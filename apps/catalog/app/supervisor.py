@@ -0,0 +1,207 @@
+"""Run the catalog as one process or as a supervisor of N forked workers.
+
+    python -m app.supervisor          # CATALOG_WORKERS=4 CATALOG_UVLOOP=1 ...
+
+Every worker runs the full catalog (gRPC + HTTP, app.run.main) and binds
+the same ports with SO_REUSEPORT, so the kernel spreads connections over
+them. Each worker also serves the HTTP API alone on
+``worker_http_port_base`` + its slot (per-worker metrics and stats), and
+readiness on the shared ports covers every worker (``pod_ready``). This
+module imports nothing that opens sockets, threads or gRPC
+state: the engine, the pools and the gRPC core are all created after fork.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+from multiprocessing.sharedctypes import RawArray
+from typing import Optional
+from .config import settings
+
+logger = logging.getLogger("catalog.supervisor")
+
+# a worker that dies right after start is restarted at most this often
+_RESTART_DELAY_SECONDS = 1.0
+
+# this process's worker slot, 0 .. workers-1 (a restart reuses the slot);
+# 0 also in a single-process run
+_worker_index = 0
+
+# one ready flag per worker slot in memory shared by the forked workers;
+# None in a single-process run
+_ready_flags: Optional[RawArray] = None
+
+
+def worker_count() -> int:
+    return settings.workers or os.cpu_count() or 1
+
+
+def is_first_worker() -> bool:
+    # for once-per-pod duties such as writing the hot-ids snapshot
+    return _worker_index == 0
+
+
+def worker_index() -> int:
+    return _worker_index
+
+
+def worker_http_ports() -> list[int]:
+    # per slot, the port that worker serves the HTTP API on by itself;
+    # empty in a single-process run or with worker_http_port_base = 0
+    if _ready_flags is None or not settings.worker_http_port_base:
+        return []
+    return [settings.worker_http_port_base + i for i in range(len(_ready_flags))]
+
+
+def set_worker_ready(ready: bool) -> None:
+    if _ready_flags is not None:
+        _ready_flags[_worker_index] = ready
+
+
+def pod_ready() -> bool:
+    """Whether every worker of the pod is ready (this process's own
+    readiness in a single-process run is the caller's to check)."""
+    return _ready_flags is None or all(_ready_flags)
+
+
+def apply_connection_budget(budget: int, workers: int) -> None:
+    """Size this process's pools from its share of the pod-wide budget.
+
+    The share is split between the SQLAlchemy engine (half base pool, half
+    overflow) and, when enabled, the asyncpg fast read pool.
+    """
+    share = max(2, budget // workers)
+    if settings.fast_read_path:
+        fast = share // 2
+        share -= fast
+        settings.fast_read_pool_max_size = fast
+        settings.fast_read_pool_min_size = min(settings.fast_read_pool_min_size, fast)
+    settings.db_pool_size = (share + 1) // 2
+    settings.db_max_overflow = share - settings.db_pool_size
+    settings.warmup_pool_connections = min(
+        settings.warmup_pool_connections, settings.db_pool_size
+    )
+
+
+def run_worker() -> None:
+    # imported here so the engine and the gRPC core are created in the worker
+    from .run import main
+
+    loop_factory = None
+    if settings.uvloop:
+        try:
+            import uvloop
+
+            loop_factory = uvloop.new_event_loop
+        except ImportError:
+            logger.warning("uvloop is not installed, using the asyncio loop")
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
+
+
+def _spawn(index: int) -> int:
+    global _worker_index
+    pid = os.fork()
+    if pid:
+        return pid
+    _worker_index = index
+    # worker: default signal handling until app.run installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 0
+    try:
+        run_worker()
+    except BaseException:
+        logger.exception("worker failed")
+        code = 1
+    finally:
+        logging.shutdown()
+        os._exit(code)
+
+
+def supervise(workers: int) -> int:
+    """Fork ``workers`` workers and restart any that die until SIGTERM/SIGINT.
+
+    A signal is forwarded to every worker as SIGTERM (each drains on its
+    own); workers still running ``shutdown_grace_seconds`` + 5s later are
+    killed. Returns the exit code for the supervisor.
+    """
+    global _ready_flags
+    stopping_since = None
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping_since
+        if stopping_since is None:
+            stopping_since = time.monotonic()
+            logger.info(
+                "stopping workers on signal %s", signum, extra={"signal": signum}
+            )
+            for pid in children:
+                os.kill(pid, signal.SIGTERM)
+
+    children: dict[int, tuple[float, int]] = {}  # pid -> (start time, slot)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    _ready_flags = RawArray("b", workers)
+    for index in range(workers):
+        children[_spawn(index)] = (time.monotonic(), index)
+    logger.info(
+        "workers started: pids %s", sorted(children), extra={"pids": sorted(children)}
+    )
+
+    exit_code = 0
+    while children:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if (
+                stopping_since is not None
+                and time.monotonic() - stopping_since
+                > settings.shutdown_grace_seconds + 5
+            ):
+                for pid in children:
+                    os.kill(pid, signal.SIGKILL)
+            time.sleep(0.2)
+            continue
+        child = children.pop(pid, None)
+        if child is None:
+            continue
+        started, index = child
+        # the slot is not ready until its replacement has warmed up
+        _ready_flags[index] = False
+        code = os.waitstatus_to_exitcode(status)
+        if stopping_since is not None:
+            exit_code = exit_code or max(code, 0)
+            continue
+        logger.warning(
+            "worker %s exited with code %s, restarting",
+            pid,
+            code,
+            extra={"pid": pid, "code": code},
+        )
+        time.sleep(max(0.0, started + _RESTART_DELAY_SECONDS - time.monotonic()))
+        children[_spawn(index)] = (time.monotonic(), index)
+    return exit_code
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
+    workers = worker_count()
+    if settings.db_connection_budget:
+        apply_connection_budget(settings.db_connection_budget, workers)
+    if workers == 1:
+        run_worker()
+        return
+    sys.exit(supervise(workers))
+
+
+if __name__ == "__main__":
+    # run the imported module, so the worker state set by supervise() is
+    # the one app.warmup and friends read (not this __main__ copy's)
+    from app.supervisor import main as supervisor_main
+
+    supervisor_main()
@@ -0,0 +1,75 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# gRPC trailing metadata key carrying the per-stage breakdown to the caller
+TIMING_METADATA_KEY = "catalog-timing"
+
+
+class StageTimings:
+    """Time spent per named stage (pool, sql, hydrate, ...) of one request.
+
+    Durations of a stage that runs several times add up; concurrent work
+    (e.g. the legs of a hybrid search) is summed, so stages can add up to
+    more than the wall time.
+    """
+
+    __slots__ = ("stages", "started")
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, other: "StageTimings") -> None:
+        for name, seconds in other.stages.items():
+            self.add(name, seconds)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_millis(self) -> dict[str, float]:
+        return {name: round(s * 1000, 3) for name, s in self.stages.items()}
+
+    def header(self) -> str:
+        # Server-Timing syntax: "sql;dur=1.204, hydrate;dur=0.081"
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.as_millis().items())
+
+
+_current: ContextVar[Optional[StageTimings]] = ContextVar(
+    "catalog_stage_timings", default=None
+)
+
+
+def start_timings() -> StageTimings:
+    """Start collecting stages for the request running in this context."""
+    timings = StageTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[StageTimings]:
+    return _current.get()
+
+
+def record(name: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    # no-op outside a request (warm-up, background cache warming)
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
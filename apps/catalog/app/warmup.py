@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Mapping, Optional
+import httpx
+from grpc_health.v1 import health, health_pb2
+from .config import settings
+from .db import AsyncSessionLocal
+from .domain.hotkeys import hot_products
+from .domain.models import ProductView
+from .infrastructure.repositories import SqlProductRepository, warm_product_cache
+from .supervisor import pod_ready, set_worker_ready
+
+logger = logging.getLogger("catalog.warmup")
+
+CATALOG_SERVICE = "catalog.v1.CatalogService"
+
+
+class Readiness:
+    """Serving state shared by the gRPC health service and the HTTP health route.
+
+    Starts NOT_SERVING; ``mark_serving`` flips both once warm-up is done.
+    While overloaded (load shedding) only the CatalogService entry reports
+    NOT_SERVING: clients steer away, but the pod stays in rotation, since
+    every replica tends to overload at once.
+
+    Under the supervisor the overall entry and the HTTP route report the
+    whole pod (``pod_ready``: every worker warmed up), as probes land on
+    any worker; the CatalogService entry describes this worker, whose
+    connections a client holds.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.overloaded = False
+        self.health = health.aio.HealthServicer()
+        self._overall = None
+
+    @property
+    def pod_ready(self) -> bool:
+        return self.ready and pod_ready()
+
+    async def mark_not_serving(self) -> None:
+        self.ready = False
+        set_worker_ready(False)
+        await self._publish()
+
+    async def mark_serving(self) -> None:
+        self.ready = True
+        set_worker_ready(True)
+        await self._publish()
+
+    async def follow_pod(self, interval: float = 0.5) -> None:
+        """Keep the overall entry in step with the other workers' readiness."""
+        while True:
+            await asyncio.sleep(interval)
+            await self._publish()
+
+    async def set_overloaded(self, overloaded: bool) -> None:
+        self.overloaded = overloaded
+        if self.ready:
+            await self.health.set(CATALOG_SERVICE, self._service_status())
+
+    def _service_status(self):
+        if self.ready and not self.overloaded:
+            return health_pb2.HealthCheckResponse.SERVING
+        return health_pb2.HealthCheckResponse.NOT_SERVING
+
+    async def _publish(self) -> None:
+        overall = (
+            health_pb2.HealthCheckResponse.SERVING
+            if self.pod_ready
+            else health_pb2.HealthCheckResponse.NOT_SERVING
+        )
+        if overall != self._overall:
+            self._overall = overall
+            await self.health.set(health.OVERALL_HEALTH, overall)
+        await self.health.set(CATALOG_SERVICE, self._service_status())
+
+
+readiness = Readiness()
+
+
+async def open_pool_connections(n: int) -> None:
+    """Open ``n`` pooled connections at once and run the hot ORM reads on each.
+
+    The asyncpg dialect caches prepared statements per connection, so this
+    leaves ``n`` idle connections with GetProduct/BatchGetProducts prepared.
+    """
+    all_open = asyncio.Event()
+    finished = 0
+
+    async def hold() -> None:
+        nonlocal finished
+        async with AsyncSessionLocal() as session:
+            try:
+                repo = SqlProductRepository(session)
+                await repo.get("")
+                await repo.batch_get([""])
+            finally:
+                finished += 1
+                if finished == n:
+                    all_open.set()
+            # keep this connection checked out until all n are open
+            await all_open.wait()
+
+    await asyncio.gather(*(hold() for _ in range(n)))
+
+
+def load_hot_ids_snapshot(path: str) -> list[str]:
+    # accepts a plain JSON list of ids or the /api/hotkeys response body
+    data = json.loads(Path(path).read_text())
+    if isinstance(data, dict):
+        data = [entry["id"] for entry in data["top"]]
+    return [str(pid) for pid in data]
+
+
+def save_hot_ids_snapshot(path: str, limit: int) -> None:
+    ids = [pid for pid, _ in hot_products.top(limit)]
+    # per-process tmp name: concurrent writers never rename each other's file
+    tmp = Path(f"{path}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(ids))
+    tmp.replace(path)
+
+
+async def fetch_peer_hot_ids(peer_url: str, limit: int) -> list[str]:
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        resp = await client.get(
+            f"{peer_url.rstrip('/')}/api/hotkeys", params={"limit": limit}
+        )
+        resp.raise_for_status()
+        return [entry["id"] for entry in resp.json()["top"]]
+
+
+async def hot_ids_to_preload() -> list[str]:
+    # snapshot from the previous run first, then a running peer's hot keys
+    limit = settings.warmup_preload_count
+    if settings.warmup_snapshot_path and Path(settings.warmup_snapshot_path).exists():
+        return load_hot_ids_snapshot(settings.warmup_snapshot_path)[:limit]
+    if settings.warmup_peer_url:
+        return await fetch_peer_hot_ids(settings.warmup_peer_url, limit)
+    return []
+
+
+async def preload_products(
+    ids: list[str],
+    fetch: Callable[[list[str]], Awaitable[Mapping[str, ProductView]]],
+) -> int:
+    loaded = 0
+    for start in range(0, len(ids), settings.loader_max_batch):
+        chunk = ids[start : start + settings.loader_max_batch]
+        loaded += await warm_product_cache(chunk, fetch)
+    return loaded
+
+
+async def warm_up(
+    fetch: Callable[[list[str]], Awaitable[Mapping[str, ProductView]]],
+) -> None:
+    """Open pool connections, prepare hot statements and preload hot products.
+
+    Every step is best-effort: a failure is logged and the remaining steps
+    still run, so a broken snapshot or peer cannot keep the pod unready.
+    """
+    started = time.perf_counter()
+    try:
+        await open_pool_connections(settings.warmup_pool_connections)
+    except Exception as e:
+        logger.warning(
+            "warm-up: opening pool connections failed: %r", e, extra={"error": repr(e)}
+        )
+    loaded: Optional[int] = None
+    try:
+        loaded = await preload_products(await hot_ids_to_preload(), fetch)
+    except Exception as e:
+        logger.warning(
+            "warm-up: preloading products failed: %r", e, extra={"error": repr(e)}
+        )
+    seconds = round(time.perf_counter() - started, 3)
+    logger.info(
+        "warm-up done in %.3fs, preloaded %s products",
+        seconds,
+        loaded,
+        extra={"seconds": seconds, "preloaded": loaded},
+    )
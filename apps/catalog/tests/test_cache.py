@@ -0,0 +1,80 @@
+from app.domain.hotkeys import HotKeys
+from app.infrastructure.cache import LruCache, normalize_query
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_normalize_query():
+    assert normalize_query("  iPhone   15 ") == "iphone 15"
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LruCache(max_entries=2, ttl_seconds=60, max_bytes=1000, sizeof=len)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_expires_entries():
+    clock = FakeClock()
+    cache = LruCache(
+        max_entries=10, ttl_seconds=5, max_bytes=1000, sizeof=len, clock=clock
+    )
+    cache.set("a", "1")
+    cache.set("b", "2", ttl_seconds=20)
+    clock.now = 10
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "2"
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_keeps_to_its_memory_budget():
+    cache = LruCache(max_entries=100, ttl_seconds=60, max_bytes=10, sizeof=len)
+    cache.set("a", "x" * 6)
+    cache.set("b", "x" * 6)
+    cache.set("too big", "x" * 11)
+
+    assert "a" not in cache and "b" in cache and "too big" not in cache
+    assert cache.stats()["bytes"] == 6
+
+
+def test_lru_admission_only_when_full():
+    cache = LruCache(
+        max_entries=1,
+        ttl_seconds=60,
+        max_bytes=1000,
+        sizeof=len,
+        admit=lambda key: key == "hot",
+    )
+    cache.set("cold", "1")
+    cache.set("other", "2")
+    cache.set("hot", "3")
+
+    assert "cold" not in cache and "other" not in cache and "hot" in cache
+    assert cache.stats()["rejections"] == 1
+
+
+def test_hot_keys_top_and_decay():
+    clock = FakeClock()
+    hot = HotKeys(k=2, window_seconds=60, decay=0.5, clock=clock)
+    hot.record_many(["a"] * 10 + ["b"] * 5 + ["c"] * 2)
+
+    assert [key for key, _ in hot.top()] == ["a", "b"]
+    assert hot.admit("a", min_count=100)
+    assert not hot.admit("c", min_count=3)
+
+    clock.now = 61
+    assert hot.estimate("a") == 5
+    hot.record_many(["c"] * 20)
+    assert hot.top(1)[0][0] == "c"
@@ -0,0 +1,113 @@
+import asyncio
+import grpc
+import pytest
+from app.grpc.concurrency_interceptor import (
+    ConcurrencyLimitInterceptor,
+    GradientLimit,
+)
+
+
+class Aborted(Exception):
+    def __init__(self, code: grpc.StatusCode) -> None:
+        self.code = code
+
+
+class FakeContext:
+    def __init__(self, time_remaining=None) -> None:
+        self._time_remaining = time_remaining
+
+    def time_remaining(self):
+        return self._time_remaining
+
+    async def abort(self, code, details):
+        raise Aborted(code)
+
+
+def test_gradient_limit_grows_at_steady_latency():
+    limit = GradientLimit(initial=20, max_limit=1000)
+    for _ in range(200):
+        limit.sample(0.01, inflight=int(limit.limit))
+
+    assert limit.limit > 100
+
+
+def test_gradient_limit_shrinks_when_latency_rises():
+    limit = GradientLimit(initial=100, min_limit=10)
+    for _ in range(100):
+        limit.sample(0.01, inflight=100)
+    before = limit.limit
+    for _ in range(50):
+        limit.sample(0.1, inflight=int(limit.limit))
+
+    assert limit.limit < before / 2
+    assert limit.limit >= 10
+
+
+def test_gradient_limit_ignores_samples_at_low_utilisation():
+    limit = GradientLimit(initial=100)
+    limit.sample(0.01, inflight=1)
+    for _ in range(50):
+        limit.sample(1.0, inflight=1)
+
+    assert limit.limit == 100
+
+
+def test_low_priority_calls_are_shed_first():
+    async def run():
+        limiter = ConcurrencyLimitInterceptor(
+            GradientLimit(initial=10, min_limit=10), low_priority_share=0.5
+        )
+        release = asyncio.Event()
+
+        async def handler(request, context):
+            await release.wait()
+            return "ok"
+
+        search = limiter._wrap_unary("SearchProducts", handler)
+        get = limiter._wrap_unary("GetProduct", handler)
+        held = [asyncio.create_task(search(None, FakeContext())) for _ in range(5)]
+        await asyncio.sleep(0)
+        with pytest.raises(Aborted) as shed:
+            await search(None, FakeContext())
+        admitted = asyncio.create_task(get(None, FakeContext()))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*held, admitted)
+        return shed.value.code, admitted.result(), limiter.stats()
+
+    code, result, stats = asyncio.run(run())
+
+    assert code == grpc.StatusCode.RESOURCE_EXHAUSTED
+    assert result == "ok"
+    assert stats["rejected"] == 1
+    assert stats["inflight"] == 0
+
+
+def test_deadline_drops_recover_after_a_latency_spike():
+    async def run():
+        limiter = ConcurrencyLimitInterceptor(GradientLimit(initial=1000))
+        delay = 0.05
+
+        async def handler(request, context):
+            await asyncio.sleep(delay)
+            return "ok"
+
+        wrapped = limiter._wrap_unary("GetProduct", handler)
+        # a slow spell: the method's expected service time is now ~50ms
+        await asyncio.gather(*(wrapped(None, FakeContext()) for _ in range(30)))
+        delay = 0.001
+        served = 0
+        for _ in range(200):
+            try:
+                await wrapped(None, FakeContext(time_remaining=0.02))
+                served += 1
+            except Aborted as e:
+                assert e.code == grpc.StatusCode.DEADLINE_EXCEEDED
+        return served, limiter.stats()
+
+    served, stats = asyncio.run(run())
+
+    # calls with a 20ms deadline are dropped only until the estimate decays
+    assert 0 < stats["deadline_dropped"] < 40
+    assert served == 200 - stats["deadline_dropped"]
+    assert stats["service_time_ms"]["GetProduct"] < 20
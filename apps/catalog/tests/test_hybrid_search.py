@@ -0,0 +1,124 @@
+import asyncio
+import json
+import random
+from typing import Any, Optional, Sequence
+import pytest
+from app.domain.models import ProductView, SearchPage
+from app.services.search_strategies import HybridSearchStrategy, SearchStrategy
+
+UNIVERSE = [f"p{i:05d}" for i in range(2000)]
+
+
+class FakeLeg(SearchStrategy):
+    """A fixed ranking; the cursor is the position of the last result.
+
+    ``short_pages`` returns fewer results than asked while more remain, as
+    an ANN index scan may.
+    """
+
+    def __init__(self, order: list[str], short_pages: bool = False) -> None:
+        self.order = order
+        self.position = {pid: i for i, pid in enumerate(order)}
+        self._short_pages = short_pages
+
+    def valid_cursor(self, cursor: Any) -> bool:
+        return isinstance(cursor, int) and not isinstance(cursor, bool)
+
+    async def search_page(
+        self, session, query: str, limit: int, cursor: Any = None
+    ) -> SearchPage:
+        start = 0 if cursor is None else cursor + 1
+        if self._short_pages:
+            limit = max(1, limit // 3)
+        ids = self.order[start : start + limit]
+        cursors = list(range(start, start + len(ids)))
+        more = start + len(ids) < len(self.order)
+        next_cursor = cursors[-1] if ids and more else None
+        return SearchPage([_product(pid) for pid in ids], next_cursor, cursors)
+
+    async def ranked_before(
+        self, session, query: str, ids: Sequence[str], cursor: Any
+    ) -> set[str]:
+        if cursor is None:
+            return set()
+        return {
+            pid
+            for pid in ids
+            if pid in self.position
+            and (cursor is False or self.position[pid] <= cursor)
+        }
+
+
+class FailingLeg(FakeLeg):
+    async def search_page(self, session, query, limit, cursor=None):
+        raise RuntimeError("leg down")
+
+
+def _product(pid: str) -> ProductView:
+    return ProductView(pid, pid, None, 1.0, "USD", None)
+
+
+async def _all_pages(strategy: HybridSearchStrategy, rnd: random.Random) -> list[str]:
+    cursor: Optional[Any] = None
+    ids: list[str] = []
+    for _ in range(10_000):
+        page = await strategy.search_page(object(), "q", rnd.choice([1, 5, 20]), cursor)
+        ids += [p.id for p in page.products]
+        if page.next_cursor is None:
+            return ids
+        # the cursor travels through a page token: JSON round trip
+        cursor = json.loads(json.dumps(page.next_cursor))
+        assert strategy.valid_cursor(cursor)
+    raise AssertionError("pagination did not end")
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_pages_have_no_duplicates_and_no_gaps(seed):
+    rnd = random.Random(seed)
+    primary = rnd.sample(UNIVERSE, rnd.randint(0, 300))
+    secondary = rnd.sample(UNIVERSE, rnd.randint(0, 300))
+    if seed % 2:
+        # heavy overlap, in a different order
+        secondary = list(
+            dict.fromkeys(rnd.sample(primary, len(primary) // 2) + secondary)
+        )
+    strategy = HybridSearchStrategy(
+        FakeLeg(primary, short_pages=seed % 3 == 0), FakeLeg(secondary)
+    )
+
+    ids = asyncio.run(_all_pages(strategy, rnd))
+
+    assert len(ids) == len(set(ids))
+    assert set(ids) == set(primary) | set(secondary)
+
+
+def test_first_page_follows_reciprocal_rank_order():
+    strategy = HybridSearchStrategy(
+        FakeLeg(["a", "b", "c"]), FakeLeg(["c", "d"]), rrf_k=1
+    )
+
+    page = asyncio.run(strategy.search_page(object(), "q", 4))
+
+    # c: 1/4 + 1/2 beats a: 1/2 beats d: 1/3 beats b: 1/3 (primary first)
+    assert [p.id for p in page.products] == ["c", "a", "b", "d"]
+
+
+def test_failed_leg_degrades_to_the_other():
+    strategy = HybridSearchStrategy(
+        FailingLeg([]), FakeLeg(["a", "b"]), session_factory=None
+    )
+
+    page = asyncio.run(strategy.search_page(object(), "q", 5))
+
+    assert [p.id for p in page.products] == ["a", "b"]
+    assert strategy.degraded
+
+
+def test_cursor_shape_is_validated_per_leg():
+    strategy = HybridSearchStrategy(FakeLeg([]), FakeLeg([]))
+
+    assert strategy.valid_cursor({"legs": [None, 3]})
+    assert strategy.valid_cursor({"legs": [False, 0]})
+    assert not strategy.valid_cursor({"legs": ["3", None]})
+    assert not strategy.valid_cursor({"legs": [1]})
+    assert not strategy.valid_cursor([1, 2])
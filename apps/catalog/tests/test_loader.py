@@ -0,0 +1,105 @@
+import asyncio
+from typing import Optional
+import pytest
+from app.infrastructure.loader import BatchLoader
+
+
+class FakeBatch:
+    """batch_fn that records its calls; fails or blocks on request."""
+
+    def __init__(self, error: Optional[Exception] = None) -> None:
+        self.calls: list[list[str]] = []
+        self.error = error
+        self.release = asyncio.Event()
+        self.block = False
+
+    async def __call__(self, keys: list[str]) -> dict:
+        self.calls.append(keys)
+        if self.block:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {k: k.upper() for k in keys if k != "missing"}
+
+
+def test_concurrent_loads_share_one_batch():
+    async def run():
+        batch = FakeBatch()
+        loader = BatchLoader(batch, window_seconds=0.001)
+        results = await asyncio.gather(
+            loader.load("a"), loader.load("b"), loader.load("a"), loader.load("missing")
+        )
+        return batch, loader, results
+
+    batch, loader, results = asyncio.run(run())
+
+    assert results == ["A", "B", "A", None]
+    assert batch.calls == [["a", "b", "missing"]]
+    assert loader.stats()["coalesced"] == 1
+    assert loader.stats()["inflight"] == 0
+
+
+def test_max_batch_dispatches_without_waiting():
+    async def run():
+        batch = FakeBatch()
+        loader = BatchLoader(batch, window_seconds=10.0, max_batch=2)
+        results = await asyncio.wait_for(loader.load_many(["a", "b", "c", "d"]), 1)
+        return batch, results
+
+    batch, results = asyncio.run(run())
+
+    assert results == ["A", "B", "C", "D"]
+    assert batch.calls == [["a", "b"], ["c", "d"]]
+
+
+def test_batch_error_reaches_every_waiter_and_is_not_cached():
+    async def run():
+        batch = FakeBatch(error=ValueError("db down"))
+        loader = BatchLoader(batch, window_seconds=0.001)
+        results = await asyncio.gather(
+            loader.load("a"), loader.load("b"), return_exceptions=True
+        )
+        batch.error = None
+        return loader, results, await loader.load("a")
+
+    loader, results, retried = asyncio.run(run())
+
+    assert [type(r) for r in results] == [ValueError, ValueError]
+    assert retried == "A"
+    assert loader.stats()["inflight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_load():
+    async def run():
+        batch = FakeBatch()
+        batch.block = True
+        loader = BatchLoader(batch, window_seconds=0.001)
+        first = asyncio.create_task(loader.load("a"))
+        second = asyncio.create_task(loader.load("a"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        batch.release.set()
+        return first, await second
+
+    first, second = asyncio.run(run())
+
+    assert first.cancelled()
+    assert second == "A"
+
+
+def test_cancelled_batch_cancels_its_waiters():
+    async def run():
+        batch = FakeBatch()
+        batch.block = True
+        loader = BatchLoader(batch, window_seconds=0.001)
+        waiter = asyncio.create_task(loader.load("a"))
+        await asyncio.sleep(0.01)
+        for task in list(loader._tasks):
+            task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return loader
+
+    loader = asyncio.run(run())
+
+    assert loader.stats()["inflight"] == 0
@@ -0,0 +1,62 @@
+import base64
+import json
+import pytest
+from app.services.pagination import (
+    InvalidPageToken,
+    decode_page_token,
+    encode_page_token,
+)
+from app.services.search_strategies import (
+    FullTextSearchStrategy,
+    KeywordSearchStrategy,
+)
+
+
+def _token(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def test_round_trip():
+    cursor = [0.25, "p00042"]
+    token = encode_page_token("fulltext", "Red Shoes", cursor)
+
+    assert decode_page_token(token, "fulltext", "  red   shoes ") == cursor
+
+
+def test_token_of_another_search_is_rejected():
+    token = encode_page_token("fulltext", "red shoes", [0.25, "p1"])
+
+    with pytest.raises(InvalidPageToken, match="different search"):
+        decode_page_token(token, "fulltext", "blue shoes")
+    with pytest.raises(InvalidPageToken, match="different search"):
+        decode_page_token(token, "keyword", "red shoes")
+
+
+@pytest.mark.parametrize(
+    "token", ["", "not base64!", _token([1, 2]), _token({"c": "p1"}), _token(3)]
+)
+def test_malformed_token_is_rejected(token):
+    with pytest.raises(InvalidPageToken):
+        decode_page_token(token, "keyword", "shoes")
+
+
+@pytest.mark.parametrize(
+    "strategy, cursor, valid",
+    [
+        (KeywordSearchStrategy(), "p1", True),
+        (KeywordSearchStrategy(), 7, False),
+        (FullTextSearchStrategy(), [0.5, "p1"], True),
+        (FullTextSearchStrategy(), [True, "p1"], False),
+        (FullTextSearchStrategy(), ["0.5", "p1"], False),
+        (FullTextSearchStrategy(), [0.5], False),
+        (FullTextSearchStrategy(), None, False),
+    ],
+)
+def test_cursor_shape_is_checked_by_the_strategy(strategy, cursor, valid):
+    token = encode_page_token("s", "shoes", cursor)
+
+    if valid:
+        assert decode_page_token(token, "s", "shoes", strategy.valid_cursor) == cursor
+    else:
+        with pytest.raises(InvalidPageToken, match="malformed"):
+            decode_page_token(token, "s", "shoes", strategy.valid_cursor)
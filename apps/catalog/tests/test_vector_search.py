@@ -0,0 +1,92 @@
+import asyncio
+from collections import namedtuple
+from app.services.search_strategies import HybridSearchStrategy, VectorSearchStrategy
+from tests.test_hybrid_search import FakeLeg
+
+Row = namedtuple("Row", "id title description price currency image_url distance")
+
+
+class FakeAnnSession:
+    """Answers the vector page query over an in-memory table the way an
+    index scan that stops after ``scan_limit`` rows would (e.g. ef_search
+    without iterative scans): pages come back short though rows remain."""
+
+    def __init__(self, distances: dict[str, float], scan_limit: int) -> None:
+        self._rows = sorted(
+            (Row(pid, pid, None, 1.0, "USD", None, d) for pid, d in distances.items()),
+            key=lambda row: (row.distance, row.id),
+        )
+        self._scan_limit = scan_limit
+        self.settings: dict[str, str] = {}
+
+    async def execute(self, stmt, params):
+        if "set_config" in str(stmt):
+            self.settings[params["name"]] = params["value"]
+            return None
+        rows = self._rows
+        if "ids" in params:
+            # ranked_before: the ids at or before the cursor
+            ids = set(params["ids"])
+            rows = [row for row in rows if row.id in ids]
+            if "distance" in params:
+                cursor = (params["distance"], params["after_id"])
+                rows = [row for row in rows if (row.distance, row.id) <= cursor]
+            return _Result(rows)
+        if "distance" in params:
+            cursor = (params["distance"], params["after_id"])
+            rows = [row for row in rows if (row.distance, row.id) > cursor]
+        return _Result(rows[: min(params["limit"], self._scan_limit)])
+
+
+class _Result:
+    def __init__(self, rows) -> None:
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+    def scalars(self):
+        return [row.id for row in self._rows]
+
+
+async def _embed(query: str) -> list[float]:
+    return [0.0, 1.0]
+
+
+def _collect(strategy, session, limit: int, chunk_size: int) -> list[str]:
+    async def run():
+        ids = []
+        async for chunk in strategy.stream(session, "q", limit, chunk_size):
+            assert len(chunk) <= chunk_size
+            ids += [p.id for p in chunk]
+        return ids
+
+    return asyncio.run(run())
+
+
+# 500 products, many sharing a distance so the keyset has ties to break
+DISTANCES = {f"p{i:04d}": (i * 7 % 50) / 10 for i in range(500)}
+
+
+def test_short_index_pages_do_not_end_the_stream():
+    session = FakeAnnSession(DISTANCES, scan_limit=40)
+    strategy = VectorSearchStrategy(_embed, ef_search=40)
+
+    ids = _collect(strategy, session, limit=1000, chunk_size=200)
+
+    assert len(ids) == len(set(ids)) == 500
+    assert [DISTANCES[pid] for pid in ids] == sorted(DISTANCES.values())
+    assert session.settings["hnsw.iterative_scan"] == "strict_order"
+
+
+def test_streamed_hybrid_export_gets_every_vector_hit():
+    session = FakeAnnSession(DISTANCES, scan_limit=40)
+    keyword = [f"p{i:04d}" for i in range(400, 700)]
+    strategy = HybridSearchStrategy(
+        FakeLeg(keyword), VectorSearchStrategy(_embed, ef_search=40)
+    )
+
+    ids = _collect(strategy, session, limit=5000, chunk_size=200)
+
+    assert len(ids) == len(set(ids))
+    assert set(ids) == set(DISTANCES) | set(keyword)
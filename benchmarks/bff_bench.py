@@ -0,0 +1,116 @@
+"""Load-test the BFF in-process against a benchmark catalog.
+
+The BFF app is driven through httpx's ASGI transport (no HTTP server, no
+sockets on the BFF side). Both services are packages named ``app``, so the
+catalog cannot share the process: it runs as ``catalog_bench.py serve`` in
+a child process on the same backend options. From the repo root:
+
+    python benchmarks/bff_bench.py --products 100000 --json bff.json
+
+BFF settings come from the environment as usual (e.g. BFF_FAST_JSON=false,
+BFF_RESPONSE_CACHE_ENABLED=true) to compare configurations.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "apps", "bff"))
+
+import httpx  # noqa: E402
+from loadgen import add_load_arguments, run_scenarios, write_results  # noqa: E402
+from synthetic import EMBEDDING_DIM, id_picker, search_terms  # noqa: E402
+
+
+def start_catalog(args: argparse.Namespace) -> tuple[subprocess.Popen, int]:
+    cmd = [
+        sys.executable,
+        os.path.join(HERE, "catalog_bench.py"),
+        "serve",
+        f"--backend={args.backend}",
+        f"--products={args.products}",
+        f"--seed={args.seed}",
+    ]
+    if args.load:
+        cmd += ["--load", f"--embedding-dim={args.embedding_dim}"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if not line.startswith("ready "):
+        proc.kill()
+        sys.exit(f"catalog did not start: {line!r}")
+    return proc, int(line.split()[1])
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=("memory", "postgres"), default="memory")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--load", action="store_true")
+    parser.add_argument("--embedding-dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--ops", default="get,batch_get,search")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--search-limit", type=int, default=20)
+    parser.add_argument(
+        "--id-distribution", choices=("uniform", "zipf"), default="zipf"
+    )
+    add_load_arguments(parser)
+    args = parser.parse_args()
+
+    catalog, port = start_catalog(args)
+    # read by the BFF settings at import time
+    os.environ["BFF_CATALOG_GRPC_TARGET"] = f"127.0.0.1:{port}"
+    from app.grpc_catalog_client import close_catalog_channels
+    from app.main import app
+
+    # the BFF configures INFO logging on import; keep request logs out
+    logging.getLogger().setLevel(logging.WARNING)
+
+    pick = id_picker(args.products, args.id_distribution, args.seed)
+    terms = search_terms(1000, args.seed)
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bff"
+    )
+
+    async def checked(response: httpx.Response) -> httpx.Response:
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return response
+
+    async def get_product(n: int):
+        return await checked(await client.get(f"/api/products/{pick()}"))
+
+    async def batch_get_products(n: int):
+        ids = [pick() for _ in range(args.batch_size)]
+        return await checked(await client.get("/api/products", params={"ids": ids}))
+
+    async def search_products(n: int):
+        params = {"q": terms[n % len(terms)], "limit": args.search_limit}
+        return await checked(await client.get("/api/products/search", params=params))
+
+    ops = {
+        "get": ("GET /api/products/{id}", get_product),
+        "batch_get": (f"GET /api/products[{args.batch_size}]", batch_get_products),
+        "search": ("GET /api/products/search", search_products),
+    }
+    results = {}
+    try:
+        for key in args.ops.split(","):
+            name, op = ops[key]
+            results.update(await run_scenarios(name, op, args))
+    finally:
+        await client.aclose()
+        await close_catalog_channels()
+        catalog.terminate()
+        catalog.wait()
+    if args.json:
+        write_results(args.json, "bff", vars(args), results)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""Compare two benchmark result files (e.g. main vs. a branch).
+
+    python benchmarks/compare.py base.json head.json --threshold 10
+
+Prints throughput and latency changes per scenario; exits 1 when any
+scenario's throughput dropped, or its p99 rose, by more than --threshold %.
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = (
+    "throughput_rps",
+    "p50_ms",
+    "p99_ms",
+    "p999_ms",
+    "alloc_peak_kib_per_request",
+)
+
+
+def _change(base: float, head: float) -> float:
+    return (head - base) / base * 100 if base else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    args = parser.parse_args()
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    print(f"base {base['git_commit'][:12]}  head {head['git_commit'][:12]}")
+    regressed = []
+    for name, h in head["results"].items():
+        b = base["results"].get(name)
+        if b is None:
+            print(f"{name:<34} (new)")
+            continue
+        cells = []
+        for metric in METRICS:
+            if metric in b and metric in h:
+                cells.append(f"{metric} {_change(b[metric], h[metric]):+6.1f}%")
+        print(f"{name:<34} " + "  ".join(cells))
+        if _change(b["throughput_rps"], h["throughput_rps"]) < -args.threshold:
+            regressed.append(f"{name} throughput")
+        if _change(b["p99_ms"], h["p99_ms"]) > args.threshold:
+            regressed.append(f"{name} p99")
+    if regressed:
+        print("regressions: " + ", ".join(regressed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Closed- and open-loop load generation, latency percentiles, allocation
+measurement and the JSON result format shared by the benchmarks.
+"""
+
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Awaitable, Callable
+
+# one request; gets the request's sequence number (e.g. to pick an id)
+Op = Callable[[int], Awaitable[object]]
+
+
+def _gen0_collections() -> int:
+    return gc.get_stats()[0]["collections"]
+
+
+def summarize(latencies: list[float], errors: Counter, elapsed: float, **extra) -> dict:
+    latencies = sorted(latencies)
+
+    def pct(q: float) -> float:
+        # nearest rank
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    completed = len(latencies)
+    return {
+        "requests": completed + sum(errors.values()),
+        "errors": dict(errors),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(pct(0.50), 3),
+        "p99_ms": round(pct(0.99), 3),
+        "p999_ms": round(pct(0.999), 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        **extra,
+    }
+
+
+async def closed_loop(op: Op, concurrency: int, duration: float) -> dict:
+    """``concurrency`` workers, each sending its next request when the last
+    one completed. Throughput is what the system sustains at that depth."""
+    latencies: list[float] = []
+    errors: Counter = Counter()
+    seq = 0
+    stop_at = time.perf_counter() + duration
+
+    async def worker() -> None:
+        nonlocal seq
+        while time.perf_counter() < stop_at:
+            seq += 1
+            start = time.perf_counter()
+            try:
+                await op(seq)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    collections = _gen0_collections()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(
+        latencies,
+        errors,
+        elapsed,
+        mode="closed",
+        concurrency=concurrency,
+        gc_gen0_per_1k_requests=_per_1k(_gen0_collections() - collections, latencies),
+    )
+
+
+async def open_loop(
+    op: Op,
+    rate: float,
+    duration: float,
+    max_outstanding: int = 10_000,
+    seed: int = 0,
+) -> dict:
+    """Poisson arrivals at ``rate`` req/s regardless of how fast responses come.
+
+    Latency runs from each request's scheduled send time, so time spent
+    queued behind a slow system counts (no coordinated omission). Arrivals
+    beyond ``max_outstanding`` in-flight requests are counted as dropped.
+    """
+    loop = asyncio.get_running_loop()
+    rnd = random.Random(seed)
+    latencies: list[float] = []
+    errors: Counter = Counter()
+    tasks: set[asyncio.Task] = set()
+    dropped = 0
+    seq = 0
+
+    async def one(n: int, scheduled: float) -> None:
+        try:
+            await op(n)
+        except Exception as e:
+            errors[type(e).__name__] += 1
+            return
+        latencies.append(time.perf_counter() - scheduled)
+
+    collections = _gen0_collections()
+    start = time.perf_counter()
+    next_at = start
+    while next_at < start + duration:
+        now = time.perf_counter()
+        if next_at > now:
+            await asyncio.sleep(next_at - now)
+        # catch up in a burst when the sleep overshot several arrivals
+        while next_at <= time.perf_counter() and next_at < start + duration:
+            seq += 1
+            if len(tasks) >= max_outstanding:
+                dropped += 1
+            else:
+                task = loop.create_task(one(seq, next_at))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            next_at += rnd.expovariate(rate)
+    if tasks:
+        await asyncio.wait(tasks)
+    elapsed = time.perf_counter() - start
+    return summarize(
+        latencies,
+        errors,
+        elapsed,
+        mode="open",
+        target_rps=rate,
+        dropped=dropped,
+        gc_gen0_per_1k_requests=_per_1k(_gen0_collections() - collections, latencies),
+    )
+
+
+def _per_1k(count: int, latencies: list[float]) -> float:
+    return round(count * 1000 / len(latencies), 2) if latencies else 0.0
+
+
+async def measure_allocations(op: Op, requests: int) -> dict:
+    """Sequential requests under tracemalloc (slow, so not part of the timed
+    run). Counts everything allocated while a request is in flight, client
+    and in-process server alike.
+    """
+    gc.collect()
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    peaks = []
+    try:
+        for n in range(requests):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            await op(n)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    return {
+        "alloc_peak_kib_per_request": round(sum(peaks) / len(peaks) / 1024, 2),
+        "retained_blocks_per_request": round(
+            (sys.getallocatedblocks() - blocks) / requests, 2
+        ),
+    }
+
+
+def add_load_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--mode", choices=("closed", "open", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=32, help="closed loop")
+    parser.add_argument("--rate", type=float, default=1000, help="open loop, req/s")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds per op")
+    parser.add_argument(
+        "--alloc-requests",
+        type=int,
+        default=200,
+        help="requests in the tracemalloc pass (0 to skip)",
+    )
+    parser.add_argument("--json", help="write machine-readable results here")
+
+
+async def run_scenarios(name: str, op: Op, args: argparse.Namespace) -> dict:
+    """Warm up, then run the closed and/or open loop; returns results keyed
+    "<name>/<mode>", each with the allocation figures of ``op`` merged in."""
+    if args.warmup > 0:
+        await closed_loop(op, args.concurrency, args.warmup)
+    allocations = {}
+    if args.alloc_requests > 0:
+        allocations = await measure_allocations(op, args.alloc_requests)
+    results = {}
+    if args.mode in ("closed", "both"):
+        results[f"{name}/closed"] = {
+            **await closed_loop(op, args.concurrency, args.duration),
+            **allocations,
+        }
+    if args.mode in ("open", "both"):
+        results[f"{name}/open"] = {
+            **await open_loop(op, args.rate, args.duration),
+            **allocations,
+        }
+    for key, r in results.items():
+        print_result(key, r)
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def write_results(path: str, benchmark: str, params: dict, results: dict) -> None:
+    doc = {
+        "benchmark": benchmark,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(doc, f, indent=2)
+
+
+def print_result(name: str, r: dict) -> None:
+    line = (
+        f"{name:<34} {r['throughput_rps']:>9.0f} req/s"
+        f"  p50 {r['p50_ms']:8.2f}  p99 {r['p99_ms']:8.2f}"
+        f"  p999 {r['p999_ms']:8.2f} ms"
+    )
+    if "alloc_peak_kib_per_request" in r:
+        line += f"  {r['alloc_peak_kib_per_request']:8.1f} KiB/req"
+    if r["errors"] or r.get("dropped"):
+        line += f"  errors {sum(r['errors'].values())} dropped {r.get('dropped', 0)}"
+    print(line)
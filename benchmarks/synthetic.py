@@ -0,0 +1,130 @@
+"""Deterministic synthetic catalog: the same seed and size always give the
+same products, so results from different commits are comparable.
+
+Ids are ``p`` + a zero-padded index, so load generators can pick existing
+(or missing) ids without reading the catalog back.
+"""
+
+import io
+import math
+import random
+from typing import Iterator, NamedTuple, Optional
+
+# Zipf-ish vocabulary: low word numbers are common, so search terms range
+# from matching a large share of the catalog to a handful of products
+VOCABULARY = [f"w{i}" for i in range(5000)]
+CATEGORIES = [f"cat{i}" for i in range(200)]
+CURRENCIES = ("USD", "EUR", "GBP")
+EMBEDDING_DIM = 1536  # products.embedding is vector(1536)
+
+
+class SyntheticProduct(NamedTuple):
+    id: str
+    title: str
+    description: Optional[str]
+    price: float
+    currency: str
+    image_url: Optional[str]
+    embedding: Optional[list[float]]
+
+
+def product_id(index: int) -> str:
+    return f"p{index:09d}"
+
+
+def _word(rnd: random.Random) -> str:
+    # inverse-CDF sample of a 1/x distribution over the vocabulary
+    return VOCABULARY[int(len(VOCABULARY) ** rnd.random()) - 1]
+
+
+def _embedding(rnd: random.Random, dim: int) -> list[float]:
+    vec = [rnd.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+def synthetic_products(
+    count: int, seed: int = 42, embedding_dim: int = 0, start: int = 0
+) -> Iterator[SyntheticProduct]:
+    """Yield products ``start`` .. ``count - 1``; embeddings only if dim > 0."""
+    for index in range(start, count):
+        # one generator per product: any slice of the catalog can be rebuilt
+        rnd = random.Random(seed * 1_000_003 + index)
+        category = CATEGORIES[index % len(CATEGORIES)]
+        title = " ".join([category] + [_word(rnd) for _ in range(rnd.randint(2, 6))])
+        description = (
+            " ".join(_word(rnd) for _ in range(rnd.randint(10, 40)))
+            if rnd.random() < 0.9
+            else None
+        )
+        yield SyntheticProduct(
+            id=product_id(index),
+            title=title,
+            description=description,
+            price=round(rnd.uniform(1, 500), 2),
+            currency=CURRENCIES[index % len(CURRENCIES)],
+            image_url=(
+                f"https://img.example.com/{index}.jpg" if rnd.random() < 0.8 else None
+            ),
+            embedding=_embedding(rnd, embedding_dim) if embedding_dim else None,
+        )
+
+
+def id_picker(count: int, distribution: str = "uniform", seed: int = 42):
+    """Return a function picking ids of a ``count``-product catalog."""
+    rnd = random.Random(seed)
+    if distribution == "zipf":
+        # 1/x popularity: a few hot ids, a long cold tail (exercises the caches)
+        return lambda: product_id(int(count ** rnd.random()) - 1)
+    return lambda: product_id(rnd.randrange(count))
+
+
+def search_terms(count: int, seed: int = 42) -> list[str]:
+    # one or two words each, drawn like the titles are
+    rnd = random.Random(seed)
+    return [
+        " ".join(_word(rnd) for _ in range(rnd.choice((1, 1, 2)))) for _ in range(count)
+    ]
+
+
+def _csv_field(value) -> str:
+    if value is None:
+        return ""
+    text = str(value)
+    return '"' + text.replace('"', '""') + '"'
+
+
+async def load_postgres(
+    dsn: str,
+    count: int,
+    seed: int = 42,
+    embedding_dim: int = EMBEDDING_DIM,
+    chunk_size: int = 10_000,
+) -> None:
+    """COPY the synthetic catalog into the (migrated, empty) products table."""
+    import asyncpg
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        columns = ["id", "title", "description", "price", "currency", "image_url"]
+        if embedding_dim:
+            columns.append("embedding")
+        for start in range(0, count, chunk_size):
+            buf = io.StringIO()
+            for p in synthetic_products(
+                min(start + chunk_size, count), seed, embedding_dim, start
+            ):
+                fields = [p.id, p.title, p.description, p.price, p.currency]
+                fields.append(p.image_url)
+                if embedding_dim:
+                    fields.append("[" + ",".join(f"{x:.6f}" for x in p.embedding) + "]")
+                buf.write(",".join(map(_csv_field, fields)) + "\n")
+            await conn.copy_to_table(
+                "products",
+                source=io.BytesIO(buf.getvalue().encode()),
+                columns=columns,
+                format="csv",
+            )
+        await conn.execute("ANALYZE products")
+    finally:
+        await conn.close()